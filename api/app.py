@@ -14,7 +14,7 @@ from api.schemas import UserType
 from api.database import session_context
 from api.security import get_password_hash
 
-from api.routers.predictions import get_predictor
+from api.routers.predictions import _INFERENCE_EXECUTOR, get_predictor
 from sqlalchemy import select
 
 import logging
@@ -59,6 +59,7 @@ async def lifespan(app: FastAPI):
         logger.error(f"Erro ao inicializar cache de preditores: {e}")
 
     yield
+    _INFERENCE_EXECUTOR.shutdown()
     await engine.dispose()
     logger.info('Banco finalizado e conexões fechadas.')
 
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+
+class _PendingBatch:
+    def __init__(self, predictor):
+        self.predictor = predictor
+        self.items = []
+        self.timer = None
+
+
+class MicroBatcher:
+    """
+    Agrupa predições unitárias concorrentes num único lote por modelo.
+
+    Requisições com a mesma chave (modo, arquitetura) esperam até
+    ``max_wait_ms`` ou até o lote atingir ``max_batch_size``; o lote é então
+    executado de uma vez no ``InferenceExecutor`` e cada requisição recebe o
+    seu próprio resultado.
+    """
+
+    def __init__(self, executor, max_batch_size=32, max_wait_ms=5.0):
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = {}
+        self._tasks = set()
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def submit(self, key, predictor, smile_1, smile_2, fraction, temperature):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _PendingBatch(predictor)
+            batch.timer = loop.call_later(self.max_wait, self._flush, key)
+        batch.items.append(
+            (smile_1, smile_2, fraction, temperature, future, time.perf_counter())
+        )
+        if len(batch.items) >= self.max_batch_size:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key):
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        now = time.perf_counter()
+        waits = [now - item[-1] for item in batch.items]
+        self._batches += 1
+        self._items += len(batch.items)
+        self._max_batch = max(self._max_batch, len(batch.items))
+        self._wait_total += sum(waits)
+        self._wait_max = max(self._wait_max, *waits)
+        task = asyncio.ensure_future(self._run(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key, batch):
+        smiles1, smiles2, fracs, temps, futures, _ = zip(*batch.items)
+        try:
+            if key[0] == 'pure':
+                result = await self.executor.run(
+                    batch.predictor.predict, smiles1=list(smiles1), temp=list(temps)
+                )
+            else:
+                result = await self.executor.run(
+                    batch.predictor.predict,
+                    smiles1=list(smiles1),
+                    smiles2=list(smiles2),
+                    frac=list(fracs),
+                    temp=list(temps),
+                )
+        except Exception as exc:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for future, value in zip(futures, result):
+            if not future.done():
+                future.set_result(float(value))
+
+    def stats(self):
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'batches': self._batches,
+            'items': self._items,
+            'mean_batch_size': self._items / self._batches if self._batches else 0.0,
+            'largest_batch': self._max_batch,
+            'mean_queue_wait_ms': (
+                1000.0 * self._wait_total / self._items if self._items else 0.0
+            ),
+            'max_queue_wait_ms': 1000.0 * self._wait_max,
+        }
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import torch
+
+
+class InferenceSaturatedError(RuntimeError):
+    """Fila de inferência cheia: a requisição deve ser rejeitada."""
+
+
+class InferenceExecutor:
+    """
+    Executa a inferência fora do event loop num pool de threads limitado.
+
+    No máximo ``max_workers`` chamadas rodam ao mesmo tempo e outras
+    ``max_queue`` aguardam; acima disso ``run`` levanta
+    ``InferenceSaturatedError``. As threads intra-op do torch são divididas
+    entre as ``parallel_forwards`` passadas do encoder que de fato rodam ao
+    mesmo tempo: com um backbone compartilhado do ``ModelRegistry`` (um lock
+    por backbone) só uma roda por vez e ela recebe todos os núcleos.
+    """
+
+    def __init__(
+        self, max_workers=2, max_queue=16, torch_threads=None, parallel_forwards=None
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        if parallel_forwards is None:
+            parallel_forwards = max_workers
+        self.parallel_forwards = min(parallel_forwards, max_workers)
+        if torch_threads is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // self.parallel_forwards)
+        self.torch_threads = torch_threads
+        torch.set_num_threads(torch_threads)
+        self._pool = None
+        self._pending = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.max_queue
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                raise InferenceSaturatedError(
+                    f'Fila de inferência cheia ({self._pending} pendentes).'
+                )
+            self._pending += 1
+            if self._pool is None:
+                # Criado sob demanda: o lifespan do app chama ``shutdown`` e
+                # um novo ciclo (testes, reload) volta a usar o executor.
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='inference'
+                )
+            pool = self._pool
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                pool, partial(fn, *args, **kwargs)
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'parallel_forwards': self.parallel_forwards,
+                'max_queue': self.max_queue,
+                'torch_threads': self.torch_threads,
+                'pending': self._pending,
+                'rejected': self._rejected,
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
@@ -1,5 +1,3 @@
-import asyncio
-
 import logging
 from pathlib import Path
 
@@ -9,7 +7,9 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.batching import MicroBatcher
 from api.database import get_session
+from api.inference import InferenceExecutor, InferenceSaturatedError
 from api.schemas import (
     ViscosityBatchRequest,
     ViscosityBatchResponse,
@@ -17,12 +17,17 @@ from api.schemas import (
     ViscosityPublic,
 )
 from api.security import AuthSubject, get_current_user
+from api.settings import Settings
 
+from chemai.embedding_cache import EmbeddingCache
+from chemai.embedding_store import EmbeddingStore
 from chemai.predictor import ChemBERTPredictor
+from chemai.registry import ModelRegistry
 from proxy import configure_proxy
 
 configure_proxy()
 
+settings = Settings()
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix='/predictions', tags=['predictions'])
@@ -31,6 +36,35 @@ Session = Annotated[AsyncSession, Depends(get_session)]
 CurrentAuth = Annotated[AuthSubject, Depends(get_current_user)]
 
 _PREDICTOR_CACHE: dict[str, ChemBERTPredictor] = {}
+_INFERENCE_EXECUTOR = InferenceExecutor(
+    max_workers=settings.INFERENCE_WORKERS,
+    max_queue=settings.INFERENCE_MAX_QUEUE,
+    torch_threads=settings.INFERENCE_TORCH_THREADS,
+    parallel_forwards=settings.INFERENCE_PARALLEL_FORWARDS,
+)
+_MICRO_BATCHER = MicroBatcher(
+    _INFERENCE_EXECUTOR,
+    max_batch_size=settings.BATCH_MAX_SIZE,
+    max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+)
+_MODEL_REGISTRY = ModelRegistry()
+_EMBEDDING_CACHE = EmbeddingCache(
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES,
+)
+_EMBEDDING_STORE = (
+    EmbeddingStore(settings.EMBEDDING_STORE_DIR)
+    if settings.EMBEDDING_STORE_DIR
+    else None
+)
+
+
+def _service_unavailable(exc: InferenceSaturatedError) -> HTTPException:
+    return HTTPException(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        detail=f"Serviço de predição sobrecarregado: {exc}",
+        headers={'Retry-After': '1'},
+    )
 
 
 def get_predictor(mode: str, architecture: str) -> ChemBERTPredictor:
@@ -50,7 +84,9 @@ def get_predictor(mode: str, architecture: str) -> ChemBERTPredictor:
 
             logger.info(f"Carregando modelo {key}...")
             _PREDICTOR_CACHE[key] = ChemBERTPredictor(
-                mode=mode, model_dir=str(model_path), hf_model_name=MODEL_NAME)
+                mode=mode, model_dir=str(model_path), hf_model_name=MODEL_NAME,
+                cache=_EMBEDDING_CACHE, registry=_MODEL_REGISTRY,
+                merge_lora=settings.LORA_MERGE, store=_EMBEDDING_STORE)
             logger.info(f"Modelo {key} carregado com sucesso.")
         return _PREDICTOR_CACHE[key]
     except HTTPException:
@@ -127,19 +163,30 @@ async def predict_viscosity_batch(
                 detail="Combinação de entrada inválida no lote: todas as entradas devem seguir o padrão 'pure' ou 'mix'."
             )
         predictor = get_predictor(mode, architecture)
+        # SMILES inválidos falham só a própria linha; as demais são preditas.
         if mode == "pure":
-            viscosidades = predictor.predict(smiles1=smiles1_list, temp=temps_list)
+            viscosidades, relatorio = await _INFERENCE_EXECUTOR.run(
+                predictor.predict_valid, smiles1=smiles1_list, temp=temps_list
+            )
         else:
-            viscosidades = predictor.predict(
+            viscosidades, relatorio = await _INFERENCE_EXECUTOR.run(
+                predictor.predict_valid,
                 smiles1=smiles1_list,
                 smiles2=smiles2_list,
                 frac=fractions_list,
                 temp=temps_list
             )
-        resultados = [ViscosityPrediction(viscosity=float(v)) for v in viscosidades]
+        erros = relatorio.errors_by_row()
+        resultados = [
+            ViscosityPrediction(error=erros[i]) if i in erros
+            else ViscosityPrediction(viscosity=float(v))
+            for i, v in enumerate(viscosidades)
+        ]
         return ViscosityBatchResponse(predictions=resultados)
     except HTTPException:
         raise
+    except InferenceSaturatedError as e:
+        raise _service_unavailable(e)
     except Exception as e:
         raise HTTPException(
             status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
@@ -155,7 +202,11 @@ async def get_prediction_status(current_auth: CurrentAuth):
     return {
         'status': 'ok',
         'message': f"Predições disponíveis para {requester}",
-        'models_loaded': list(_PREDICTOR_CACHE.keys())
+        'models_loaded': list(_PREDICTOR_CACHE.keys()),
+        'backbones': _MODEL_REGISTRY.loaded(),
+        'embedding_cache': _EMBEDDING_CACHE.stats(),
+        'inference': _INFERENCE_EXECUTOR.stats(),
+        'micro_batching': _MICRO_BATCHER.stats(),
     }
 
 async def calcular_viscosidade(
@@ -166,7 +217,6 @@ async def calcular_viscosidade(
     architecture: str
 ) -> float:
     try:
-        await asyncio.sleep(0)
         if architecture not in ('base', 'lora'):
             raise HTTPException(
                 status_code=HTTPStatus.BAD_REQUEST,
@@ -182,13 +232,14 @@ async def calcular_viscosidade(
                 detail="Parâmetros inválidos: para 'pure', informe apenas smile_1 e temperature. Para 'mix', informe todos (smile_1, smile_2, fraction, temperature)."
             )
         predictor = get_predictor(mode, architecture)
-        if mode == "pure":
-            viscosidade = predictor.predict(smiles1=smile_1, temp=temperature)
-        else:
-            viscosidade = predictor.predict(smiles1=smile_1, smiles2=smile_2, frac=fraction, temp=temperature)
-        return float(viscosidade)
+        return await _MICRO_BATCHER.submit(
+            (mode, architecture), predictor,
+            smile_1, smile_2, fraction, temperature
+        )
     except HTTPException:
         raise
+    except InferenceSaturatedError as e:
+        raise _service_unavailable(e)
     except Exception as e:
         raise HTTPException(
             status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
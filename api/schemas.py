@@ -58,7 +58,10 @@ class ViscosityPublic(BaseModel):
 
 
 class ViscosityPrediction(BaseModel):
-    viscosity: float
+    viscosity: Optional[float] = None
+    error: Optional[str] = Field(
+        None, description='Motivo da falha quando a linha não pôde ser predita'
+    )
 
 
 class ViscosityBatchRequest(BaseModel):
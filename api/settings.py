@@ -8,3 +8,20 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+
+    EMBEDDING_CACHE_MAX_ENTRIES: int | None = 4096
+    EMBEDDING_CACHE_MAX_BYTES: int | None = 64 * 1024 * 1024
+    LORA_MERGE: bool = False
+    EMBEDDING_STORE_DIR: str | None = None
+
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_MAX_QUEUE: int = 16
+    INFERENCE_TORCH_THREADS: int | None = None
+    # Os preditores compartilham o backbone do ModelRegistry, que serializa
+    # as passadas do encoder com um lock por modelo: os workers sobrepõem
+    # só o pré/pós-processamento e a passada em curso usa todos os núcleos.
+    # Aumente apenas com backbones distintos servidos em paralelo.
+    INFERENCE_PARALLEL_FORWARDS: int = 1
+
+    BATCH_MAX_SIZE: int = 32
+    BATCH_MAX_WAIT_MS: float = 5.0
@@ -0,0 +1,69 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from api.batching import MicroBatcher
+from api.inference import InferenceExecutor
+
+
+class RecordingPredictor:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, smiles1, smiles2=None, frac=None, temp=None):
+        self.calls.append(len(smiles1))
+        return np.asarray(temp, dtype=np.float32)
+
+
+class FailingPredictor:
+    @staticmethod
+    def predict(**kwargs):
+        raise ValueError('falhou')
+
+
+@pytest.fixture
+def executor():
+    executor = InferenceExecutor(max_workers=1, max_queue=8, torch_threads=1)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_batcher_groups_concurrent_requests(executor):
+    batcher = MicroBatcher(executor, max_batch_size=16, max_wait_ms=20)
+    predictor = RecordingPredictor()
+    results = await asyncio.gather(*[
+        batcher.submit(('pure', 'base'), predictor, 'CCO', None, None, float(t))
+        for t in range(5)
+    ])
+    assert results == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert predictor.calls == [5]
+    stats = batcher.stats()
+    assert stats['batches'] == 1
+    assert stats['largest_batch'] == len(results)
+    assert stats['mean_queue_wait_ms'] >= 0.0
+
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_at_max_batch_size(executor):
+    batcher = MicroBatcher(executor, max_batch_size=2, max_wait_ms=1000)
+    predictor = RecordingPredictor()
+    results = await asyncio.wait_for(
+        asyncio.gather(*[
+            batcher.submit(('mix', 'lora'), predictor, 'CCO', 'O', 0.5, float(t))
+            for t in range(4)
+        ]),
+        timeout=0.5,
+    )
+    assert results == [0.0, 1.0, 2.0, 3.0]
+    assert predictor.calls == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_batcher_propagates_errors(executor):
+    batcher = MicroBatcher(executor, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(ValueError, match='falhou'):
+        await batcher.submit(
+            ('pure', 'base'), FailingPredictor(), 'C', None, None, 1.0
+        )
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+import pytest
+
+from api.inference import InferenceExecutor, InferenceSaturatedError
+
+
+@pytest.mark.asyncio
+async def test_executor_runs_off_event_loop():
+    executor = InferenceExecutor(max_workers=1, max_queue=0, torch_threads=1)
+    loop_thread = threading.get_ident()
+    worker_thread = await executor.run(threading.get_ident)
+    assert worker_thread != loop_thread
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_executor_rejects_when_saturated():
+    executor = InferenceExecutor(max_workers=1, max_queue=1, torch_threads=1)
+    release = threading.Event()
+    running = [
+        asyncio.create_task(executor.run(release.wait)) for _ in range(2)
+    ]
+    await asyncio.sleep(0.05)
+    with pytest.raises(InferenceSaturatedError):
+        await executor.run(release.wait)
+    assert executor.stats()['rejected'] == 1
+    release.set()
+    await asyncio.gather(*running)
+    assert executor.stats()['pending'] == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_executor_usable_after_shutdown():
+    executor = InferenceExecutor(max_workers=1, max_queue=0, torch_threads=1)
+    await executor.run(threading.get_ident)
+    executor.shutdown()
+    executor.shutdown()
+    assert await executor.run(str.upper, 'ok') == 'OK'
+    executor.shutdown()
+
+
+def test_executor_threads_follow_parallel_forwards(monkeypatch):
+    cpus = 8
+    monkeypatch.setattr('os.cpu_count', lambda: cpus)
+    monkeypatch.setattr('torch.set_num_threads', lambda _: None)
+    shared = InferenceExecutor(max_workers=2, parallel_forwards=1)
+    split = InferenceExecutor(max_workers=2)
+    # Backbone compartilhado: uma passada por vez, com todos os núcleos.
+    assert shared.torch_threads == cpus
+    assert split.torch_threads == cpus // 2
+    shared.shutdown()
+    split.shutdown()
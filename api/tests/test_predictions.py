@@ -1,7 +1,31 @@
 from http import HTTPStatus
 
+import numpy as np
 import pytest
 
+from api.inference import InferenceExecutor
+from api.routers import predictions
+from chemai.predictor import ChemBERTPredictor
+
+
+class FakePredictor:
+    predict_valid = ChemBERTPredictor.predict_valid
+
+    def __init__(self, mode):
+        self.mode = mode
+
+    @staticmethod
+    def predict(smiles1, smiles2=None, frac=None, temp=None):
+        n = 1 if isinstance(smiles1, str) else len(smiles1)
+        return np.ones(n, dtype=np.float32)
+
+
+@pytest.fixture
+def fake_predictor(monkeypatch):
+    monkeypatch.setattr(
+        predictions, 'get_predictor', lambda mode, arch: FakePredictor(mode)
+    )
+
 
 @pytest.mark.asyncio
 async def test_predict_viscosity_valid(client, token_auth_header):
@@ -158,3 +182,61 @@ async def test_predict_viscosity_batch_unauthorized(client):
     )
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_predict_viscosity_runs_in_executor(
+    client, token_auth_header, fake_predictor
+):
+    response = client.post(
+        '/predictions/viscosity',
+        headers=token_auth_header,
+        params={'architecture': 'base'},
+        json={'smile_1': 'CCO', 'temperature': 300.0},
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == {'viscosity': 1.0}
+
+
+@pytest.mark.asyncio
+async def test_predict_viscosity_saturated_returns_503(
+    client, token_auth_header, fake_predictor, monkeypatch
+):
+    """Fila de inferência cheia — deve retornar 503 com Retry-After"""
+    saturated = InferenceExecutor(max_workers=1, max_queue=0, torch_threads=1)
+    saturated._pending = saturated.capacity
+    monkeypatch.setattr(predictions, '_INFERENCE_EXECUTOR', saturated)
+    response = client.post(
+        '/predictions/viscosity/batch',
+        headers=token_auth_header,
+        params={'architecture': 'base'},
+        json={'inputs': [{'smile_1': 'CCO', 'temperature': 300.0}]},
+    )
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert 'Retry-After' in response.headers
+
+
+@pytest.mark.asyncio
+async def test_predict_viscosity_batch_fails_only_invalid_rows(
+    client, token_auth_header, fake_predictor
+):
+    response = client.post(
+        '/predictions/viscosity/batch',
+        headers=token_auth_header,
+        params={'architecture': 'base'},
+        json={
+            'inputs': [
+                {'smile_1': s1, 'smile_2': s2, 'fraction': 0.5, 'temperature': t}
+                for s1, s2, t in [
+                    ('CCO', 'O', 300.0),
+                    ('CCO', 'C1CC', 310.0),
+                    ('CC', 'O', 320.0),
+                ]
+            ]
+        },
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    rows = response.json()['predictions']
+    assert [row['viscosity'] for row in rows] == [1.0, None, 1.0]
+    assert rows[0]['error'] is None
+    assert 'C1CC' in rows[1]['error']
@@ -1,3 +1,4 @@
+import copy
 import os
 import json
 from typing import Optional
@@ -63,7 +64,10 @@ class BestModelExporter(pl.Callback):
 
     def _export_mlp(self, best_model):
         try:
-            torch.save(best_model.mlp, os.path.join(self.export_dir, 'mlp.pt'))
+            # Cópia em fp32: o predictor roda em fp32 qualquer que seja a
+            # precisão do treino (ex.: 'bf16-true').
+            mlp = copy.deepcopy(best_model.mlp).float()
+            torch.save(mlp, os.path.join(self.export_dir, 'mlp.pt'))
             self._log('MLP salva em mlp.pt')
         except Exception as exc:
             self._log(f'Erro ao salvar MLP: {exc}')
@@ -1,10 +1,47 @@
 # -*- coding: utf-8 -*-
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 from joblib import Parallel, delayed
 from rdkit import Chem
 from rdkit.Chem import AllChem, Crippen, Descriptors, rdMolDescriptors
 from rdkit.Chem import GraphDescriptors as GD
 
+from chemai.descriptor_cache import molecule_key
+from chemai.embedding_cache import canonical_smiles
+from chemai.mixture_view import SymmetricMixtureView
+from chemai.validation import combine_reports, validate_smiles
+
+CHI_NAMES = ('Chi0', 'Chi1', 'Chi0v', 'Chi1v', 'Chi2v', 'Chi3v')
+VSA_FAMILIES = ('PEOE_VSA', 'SlogP_VSA', 'EState_VSA')
+
+
+def _nan(mol):
+    _ = mol
+    return float('nan')
+
+
+def _safe_call(func, mol):
+    try:
+        return float(func(mol))
+    except Exception:
+        return float('nan')
+
+
+@lru_cache(maxsize=None)
+def descriptor_family(prefix):
+    """Pares (nome, função) de ``Descriptors`` com o prefixo, resolvidos uma vez."""
+    family = []
+    for name in dir(Descriptors):
+        func = getattr(Descriptors, name, None)
+        if name.startswith(prefix) and callable(func):
+            family.append((name, func))
+    return tuple(family)
+
+
+CHI_DESCRIPTORS = tuple((name, getattr(GD, name, None) or _nan) for name in CHI_NAMES)
+
 
 class ChemFeaturizer:
     SMARTS = {
@@ -19,8 +56,10 @@ class ChemFeaturizer:
 
     HALOGENS = {9: 'F', 17: 'Cl', 35: 'Br', 53: 'I'}
 
-    def __init__(self):
-        pass
+    def __init__(self, cache=None, chunk_size=256):
+        # ``cache``: DescriptorCache, SQLiteDescriptorCache ou None.
+        self.cache = cache
+        self.chunk_size = chunk_size
 
     @staticmethod
     def smiles_to_mol(smiles_list):
@@ -41,149 +80,246 @@ class ChemFeaturizer:
 
     @staticmethod
     def compute_descriptor_family(mol, prefix):
-        fam = {}
-        for name in dir(Descriptors):
-            if name.startswith(prefix):
-                func = getattr(Descriptors, name, None)
-                if callable(func):
-                    try:
-                        fam[name] = float(func(mol))
-                    except Exception:
-                        fam[name] = float('nan')
-        return fam
+        return {
+            name: _safe_call(func, mol) for name, func in descriptor_family(prefix)
+        }
 
     @staticmethod
     def compute_chi_descriptors(mol):
-        chi = {}
-        for name in ['Chi0', 'Chi1', 'Chi0v', 'Chi1v', 'Chi2v', 'Chi3v']:
-            f = getattr(GD, name, None)
-            try:
-                chi[name] = float(f(mol)) if callable(f) else float('nan')
-            except Exception:
-                chi[name] = float('nan')
-        return chi
+        return {name: _safe_call(func, mol) for name, func in CHI_DESCRIPTORS}
 
     @staticmethod
-    def get_features(mol):  # noqa: PLR0915
+    def get_feature_vector(mol, out=None):
+        """Preenche uma linha na ordem de ``FEATURE_NAMES``."""
         try:
             AllChem.ComputeGasteigerCharges(mol)
         except Exception:
             pass
+        row = np.empty(len(FEATURE_NAMES)) if out is None else out
+        for i, (_, func) in enumerate(DESCRIPTOR_PLAN):
+            row[i] = _safe_call(func, mol)
+        return row
 
-        feats = {}
-        # Básicos/polaridade
-        feats['peso_molecular'] = Descriptors.MolWt(mol)
-        feats['peso_molecular_heavy'] = Descriptors.HeavyAtomMolWt(mol)
-        feats['peso_molecular_exato'] = Descriptors.ExactMolWt(mol)
-        feats['atomos_pesados'] = Descriptors.HeavyAtomCount(mol)
-        feats['eletrons_valencia'] = Descriptors.NumValenceElectrons(mol)
-        f_rad = getattr(Descriptors, 'NumRadicalElectrons', None)
-        feats['eletrons_radicais'] = float(f_rad(mol))
-        feats['tpsa'] = rdMolDescriptors.CalcTPSA(mol)
-        feats['logp'] = Crippen.MolLogP(mol)
-        feats['molar_refractivity'] = Crippen.MolMR(mol)
-        feats['lig_rotacionais'] = Descriptors.NumRotatableBonds(mol)
-        feats['frac_csp3'] = Descriptors.FractionCSP3(mol)
-
-        # Forma/estrutura
-        feats['hall_kier_alpha'] = Descriptors.HallKierAlpha(mol)
-        feats['kappa1'] = Descriptors.Kappa1(mol)
-        feats['kappa2'] = Descriptors.Kappa2(mol)
-        feats['kappa3'] = Descriptors.Kappa3(mol)
-        f_balaban = getattr(Descriptors, 'BalabanJ', None)
-        f_bertz = getattr(Descriptors, 'BertzCT', None)
-        if callable(f_balaban):
-            feats['balabanJ'] = float(f_balaban(mol))
-        else:
-            float('nan')
-        if callable(f_bertz):
-            feats['bertzCT'] = float(f_bertz(mol))
-        else:
-            float('nan')
-        feats.update(ChemFeaturizer.compute_chi_descriptors(mol))
+    @staticmethod
+    def get_features(mol):
+        vector = ChemFeaturizer.get_feature_vector(mol)
+        feats = dict(zip(FEATURE_NAMES, vector.tolist()))
+        for name in INTEGER_FEATURES:
+            if not np.isnan(feats[name]):
+                feats[name] = int(feats[name])
+        return feats
 
-        # Anéis
-        feats['num_rings'] = rdMolDescriptors.CalcNumRings(mol)
-        feats['num_aromatic_rings'] = rdMolDescriptors.CalcNumAromaticRings(mol)
-        feats['num_aliphatic_rings'] = rdMolDescriptors.CalcNumAliphaticRings(mol)
-        feats['num_saturated_rings'] = rdMolDescriptors.CalcNumSaturatedRings(mol)
-        feats['num_aromatic_carbocycles'] = rdMolDescriptors.CalcNumAromaticCarbocycles(
-            mol
-        )
-        feats['num_aromatic_heterocycles'] = (
-            rdMolDescriptors.CalcNumAromaticHeterocycles(mol)
-        )
-        feats['num_saturated_carbocycles'] = (
-            rdMolDescriptors.CalcNumSaturatedCarbocycles(mol)
+    def _compute(self, smiles, n_jobs):
+        # Os workers recebem blocos de SMILES (não objetos Mol) e devolvem
+        # blocos numpy, reduzindo a serialização e o custo por tarefa.
+        chunks = [
+            smiles[i : i + self.chunk_size]
+            for i in range(0, len(smiles), self.chunk_size)
+        ]
+        blocks = Parallel(n_jobs=n_jobs)(
+            delayed(featurize_smiles_block)(chunk) for chunk in chunks
         )
-        feats['num_saturated_heterocycles'] = (
-            rdMolDescriptors.CalcNumSaturatedHeterocycles(mol)
+        return np.vstack(blocks) if blocks else np.empty((0, len(FEATURE_NAMES)))
+
+    def _lookup(self, smiles, n_jobs):
+        if self.cache is None:
+            return self._compute(smiles, n_jobs)
+        keys = [molecule_key(s) for s in smiles]
+        found = self.cache.get_many(keys)
+        # Entradas gravadas com outro conjunto de descritores são recalculadas.
+        missing = [
+            i
+            for i, key in enumerate(keys)
+            if len(found.get(key, ())) != len(FEATURE_NAMES)
+        ]
+        if missing:
+            computed = self._compute([smiles[i] for i in missing], n_jobs)
+            new = {keys[i]: row.tolist() for i, row in zip(missing, computed)}
+            self.cache.put_many(new)
+            found.update(new)
+        return np.array([found[key] for key in keys], dtype=np.float64).reshape(
+            len(keys), len(FEATURE_NAMES)
         )
-        feats['num_aliphatic_carbocycles'] = (
-            rdMolDescriptors.CalcNumAliphaticCarbocycles(mol)
+
+    def unique_features(self, smiles, n_jobs=-1):
+        """
+        Calcula os descritores uma única vez por molécula distinta.
+
+        Retorna ``(tabela, códigos, relatório)``: ``tabela.iloc[códigos]``
+        reconstrói uma linha por SMILES de entrada, com as colunas em
+        ``FEATURE_NAMES``. SMILES inválidos não são enviados aos workers:
+        apontam para a última linha da tabela (NaN) e constam do relatório.
+        """
+        report = validate_smiles(smiles)
+        valid = pd.Series(smiles, dtype=object).where(report.mask)
+        raw_codes, raw_uniques = pd.factorize(valid)
+        canon = [canonical_smiles(s) for s in raw_uniques]
+        canon_codes, uniques = pd.factorize(pd.Series(canon, dtype=object))
+        features = np.vstack([
+            self._lookup(list(uniques), n_jobs),
+            np.full((1, len(FEATURE_NAMES)), np.nan),
+        ])
+        codes = np.full(len(raw_codes), len(uniques))
+        valid_rows = raw_codes >= 0
+        codes[valid_rows] = canon_codes[raw_codes[valid_rows]]
+        table = pd.DataFrame(features, columns=list(FEATURE_NAMES))
+        return table, codes, report
+
+    @staticmethod
+    def _broadcast(table, codes, prefix=''):
+        frame = table.iloc[codes].reset_index(drop=True)
+        return restore_integer_columns(frame).add_prefix(prefix)
+
+    def featurize_pure(self, df, n_jobs=-1, return_report=False):
+        # Linhas com SMILES inválido ficam com NaN; ``report.mask`` as marca.
+        table, codes, report = self.unique_features(df['MOL'], n_jobs)
+        feat_df = self._broadcast(table, codes)
+        feat_df['T'] = df['T'].values
+        feat_df['logV'] = df['logV'].values
+        return (feat_df, report) if return_report else feat_df
+
+    def featurize_mix_parallel(self, df, n_jobs=-1, as_view=False, return_report=False):
+        # Componentes 1 e 2 compartilham a mesma tabela de descritores; a
+        # orientação trocada (2, 1, 1 - frac) é montada pela visão simétrica.
+        n = len(df)
+        smiles = pd.concat([df['MOL_1'], df['MOL_2']], ignore_index=True)
+        table, codes, report = self.unique_features(smiles, n_jobs)
+        report = combine_reports(report.slice(0, n), report.slice(n, 2 * n))
+        features = table.to_numpy()
+        view = SymmetricMixtureView(
+            features,
+            features,
+            frac=df['MolFrac_1'].to_numpy(),
+            extra=df['T'].to_numpy(),
+            target=df['logV'].to_numpy(),
+            index_1=codes[:n],
+            index_2=codes[n:],
+            feature_names=table.columns,
+            extra_names=['T'],
         )
-        feats['num_aliphatic_heterocycles'] = (
-            rdMolDescriptors.CalcNumAliphaticHeterocycles(mol)
+        result = (
+            view
+            if as_view
+            else restore_integer_columns(view.to_frame(), prefixes=('mol1_', 'mol2_'))
         )
+        return (result, report) if return_report else result
 
-        # Heteroátomos e carga formal
-        feats['num_heteroatoms'] = rdMolDescriptors.CalcNumHeteroatoms(mol)
-        feats['formal_charge'] = sum(a.GetFormalCharge() for a in mol.GetAtoms())
 
-        # Cargas parciais
-        try:
-            feats['max_abs_partial_charge'] = Descriptors.MaxAbsPartialCharge(mol)
-            feats['min_abs_partial_charge'] = Descriptors.MinAbsPartialCharge(mol)
-            feats['max_partial_charge'] = Descriptors.MaxPartialCharge(mol)
-            feats['min_partial_charge'] = Descriptors.MinPartialCharge(mol)
-        except Exception:
-            feats['max_abs_partial_charge'] = float('nan')
-            feats['min_abs_partial_charge'] = float('nan')
-            feats['max_partial_charge'] = feats['min_partial_charge'] = float('nan')
+def featurize_smiles_block(smiles):
+    """Interpreta e calcula os descritores de um bloco de SMILES no worker."""
+    block = np.empty((len(smiles), len(FEATURE_NAMES)))
+    for i, smi in enumerate(smiles):
+        ChemFeaturizer.get_feature_vector(Chem.MolFromSmiles(smi), out=block[i])
+    return block
 
-        # Superfície
-        feats['labute_asa'] = rdMolDescriptors.CalcLabuteASA(mol)
-        feats.update(ChemFeaturizer.compute_descriptor_family(mol, 'PEOE_VSA'))
-        feats.update(ChemFeaturizer.compute_descriptor_family(mol, 'SlogP_VSA'))
-        feats.update(ChemFeaturizer.compute_descriptor_family(mol, 'EState_VSA'))
-
-        # Halogênios
-        feats.update(ChemFeaturizer.count_halogens(mol))
-
-        # Grupos funcionais-chave
-        flags = {
-            name: ChemFeaturizer.bool_feature(mol, patt)
-            for name, patt in ChemFeaturizer.SMARTS.items()
-        }
-        feats.update(flags)
 
-        return feats
+def restore_integer_columns(frame, prefixes=('',)):
+    """
+    Volta contagens e flags de ``INTEGER_FEATURES`` para int64.
+
+    Os blocos numpy são float64; colunas com NaN (SMILES inválido) continuam
+    float64, as demais recuperam o dtype inteiro esperado pelos esquemas
+    ONNX/sklearn treinados sobre o formato antigo.
+    """
+    ints = {}
+    for prefix in prefixes:
+        for name in INTEGER_FEATURES:
+            column = frame[prefix + name]
+            if not column.isna().any():
+                ints[prefix + name] = np.int64
+    return frame.astype(ints) if ints else frame
 
-    def featurize_pure(self, df, n_jobs=-1):
-        mols = self.smiles_to_mol(df['MOL'])
-        feats = Parallel(n_jobs=n_jobs)(delayed(self.get_features)(mol) for mol in mols)
-        feat_df = pd.DataFrame(feats)
-        feat_df['T'] = df['T'].values
-        feat_df['logV'] = df['logV'].values
-        return feat_df
 
-    def featurize_mix_parallel(self, df, n_jobs=-1):
-        mols1 = self.smiles_to_mol(df['MOL_1'])
-        mols2 = self.smiles_to_mol(df['MOL_2'])
-        feat1 = Parallel(n_jobs=n_jobs)(delayed(self.get_features)(m) for m in mols1)
-        feat2 = Parallel(n_jobs=n_jobs)(delayed(self.get_features)(m) for m in mols2)
-        feat1 = pd.DataFrame(feat1).add_prefix('mol1_')
-        feat2 = pd.DataFrame(feat2).add_prefix('mol2_')
+def _formal_charge(mol):
+    return sum(a.GetFormalCharge() for a in mol.GetAtoms())
 
-        feat12 = pd.concat([feat1, feat2], axis=1)
-        feat21 = pd.concat([feat2, feat1], axis=1)
 
-        feat12['frac'] = df['MolFrac_1'].values
-        feat12['T'] = df['T'].values
-        feat12['logV'] = df['logV'].values
+def _atom_counter(atomic_num):
+    def count(mol):
+        return sum(a.GetAtomicNum() == atomic_num for a in mol.GetAtoms())
+
+    return count
+
+
+def _substructure(patt):
+    def has(mol):
+        return mol.HasSubstructMatch(patt)
+
+    return has
+
+
+def build_descriptor_plan():
+    """Lista ordenada e fixa de (nome, função) usada por ``get_feature_vector``."""
+    plan = [
+        # Básicos/polaridade
+        ('peso_molecular', Descriptors.MolWt),
+        ('peso_molecular_heavy', Descriptors.HeavyAtomMolWt),
+        ('peso_molecular_exato', Descriptors.ExactMolWt),
+        ('atomos_pesados', Descriptors.HeavyAtomCount),
+        ('eletrons_valencia', Descriptors.NumValenceElectrons),
+        ('eletrons_radicais', getattr(Descriptors, 'NumRadicalElectrons', _nan)),
+        ('tpsa', rdMolDescriptors.CalcTPSA),
+        ('logp', Crippen.MolLogP),
+        ('molar_refractivity', Crippen.MolMR),
+        ('lig_rotacionais', Descriptors.NumRotatableBonds),
+        ('frac_csp3', Descriptors.FractionCSP3),
+        # Forma/estrutura
+        ('hall_kier_alpha', Descriptors.HallKierAlpha),
+        ('kappa1', Descriptors.Kappa1),
+        ('kappa2', Descriptors.Kappa2),
+        ('kappa3', Descriptors.Kappa3),
+        ('balabanJ', getattr(Descriptors, 'BalabanJ', _nan)),
+        ('bertzCT', getattr(Descriptors, 'BertzCT', _nan)),
+        *CHI_DESCRIPTORS,
+        # Anéis
+        ('num_rings', rdMolDescriptors.CalcNumRings),
+        ('num_aromatic_rings', rdMolDescriptors.CalcNumAromaticRings),
+        ('num_aliphatic_rings', rdMolDescriptors.CalcNumAliphaticRings),
+        ('num_saturated_rings', rdMolDescriptors.CalcNumSaturatedRings),
+        ('num_aromatic_carbocycles', rdMolDescriptors.CalcNumAromaticCarbocycles),
+        ('num_aromatic_heterocycles', rdMolDescriptors.CalcNumAromaticHeterocycles),
+        ('num_saturated_carbocycles', rdMolDescriptors.CalcNumSaturatedCarbocycles),
+        (
+            'num_saturated_heterocycles',
+            rdMolDescriptors.CalcNumSaturatedHeterocycles,
+        ),
+        ('num_aliphatic_carbocycles', rdMolDescriptors.CalcNumAliphaticCarbocycles),
+        (
+            'num_aliphatic_heterocycles',
+            rdMolDescriptors.CalcNumAliphaticHeterocycles,
+        ),
+        # Heteroátomos e carga formal
+        ('num_heteroatoms', rdMolDescriptors.CalcNumHeteroatoms),
+        ('formal_charge', _formal_charge),
+        # Cargas parciais
+        ('max_abs_partial_charge', Descriptors.MaxAbsPartialCharge),
+        ('min_abs_partial_charge', Descriptors.MinAbsPartialCharge),
+        ('max_partial_charge', Descriptors.MaxPartialCharge),
+        ('min_partial_charge', Descriptors.MinPartialCharge),
+        # Superfície
+        ('labute_asa', rdMolDescriptors.CalcLabuteASA),
+    ]
+    for prefix in VSA_FAMILIES:
+        plan.extend(descriptor_family(prefix))
+    # Halogênios e grupos funcionais-chave
+    plan.extend(
+        (symbol, _atom_counter(z)) for z, symbol in ChemFeaturizer.HALOGENS.items()
+    )
+    plan.extend(
+        (name, _substructure(patt)) for name, patt in ChemFeaturizer.SMARTS.items()
+    )
+    return tuple(plan)
 
-        feat21['frac'] = 1 - df['MolFrac_1'].values
-        feat21['T'] = df['T'].values
-        feat21['logV'] = df['logV'].values
 
-        return pd.concat([feat12, feat21], axis=0).reset_index(drop=True)
+DESCRIPTOR_PLAN = build_descriptor_plan()
+FEATURE_NAMES = tuple(name for name, _ in DESCRIPTOR_PLAN)
+# Contagens e flags: calculadas em float64, devolvidas como int64.
+INTEGER_FEATURES = (
+    'atomos_pesados',
+    'eletrons_valencia',
+    'lig_rotacionais',
+    *(name for name in FEATURE_NAMES if name.startswith('num_')),
+    'formal_charge',
+    *ChemFeaturizer.HALOGENS.values(),
+    *ChemFeaturizer.SMARTS,
+)
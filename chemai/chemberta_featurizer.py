@@ -1,10 +1,16 @@
+import os
 from functools import partial
 
+import numpy as np
 import pandas as pd
 import torch
 from torch.utils.data import DataLoader, Dataset
 from transformers import AutoModel, AutoTokenizer
 
+from chemai.mixture_view import SymmetricMixtureView
+from chemai.pooling import pool, pooled_dim
+from chemai.sampler import LengthBucketSampler
+
 
 class SmilesDataset(Dataset):
     def __init__(self, smiles_list):
@@ -17,11 +23,19 @@ class SmilesDataset(Dataset):
         return self.smiles[idx]
 
 
-def collate_fn(tokenizer, batch_smiles, max_length):
+def smiles_lengths(tokenizer, smiles_list, max_length):
+    enc = tokenizer(
+        list(smiles_list), truncation=True, padding=False, max_length=max_length
+    )
+    return [len(ids) for ids in enc['input_ids']]
+
+
+def collate_fn(tokenizer, batch_smiles, max_length, padding='longest'):
+    # 'longest' preenche só até o maior SMILES do lote (padding dinâmico).
     return tokenizer(
         batch_smiles,
         truncation=True,
-        padding='max_length',
+        padding=padding,
         max_length=max_length,
         return_tensors='pt',
     )
@@ -35,12 +49,15 @@ class ChemBERTaFeaturizer:
         max_length=128,
         use_half=False,
         compile_model=False,
+        store=None,
     ):
         if device is None:
             device = 'cuda' if torch.cuda.is_available() else 'cpu'
 
         self.device = torch.device(device)
         self.max_length = max_length
+        self.model_name = model_name
+        self.store = store
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         model = AutoModel.from_pretrained(model_name)
 
@@ -61,62 +78,164 @@ class ChemBERTaFeaturizer:
         self.model = model
         self.hidden = model.config.hidden_size
 
-    def featurize(self, smiles_list, batch_size=512, num_workers=2):
+    def iter_featurize(
+        self,
+        smiles_list,
+        batch_size=512,
+        num_workers=2,
+        bucket_by_length=False,
+        poolings=('cls', 'mean'),
+    ):
+        """Gera ``(indices, {pooling: embeddings})`` por lote, sem acumular."""
         dataset = SmilesDataset(smiles_list)
+        if bucket_by_length:
+            lengths = smiles_lengths(self.tokenizer, smiles_list, self.max_length)
+            batches = list(LengthBucketSampler(lengths, batch_size))
+        else:
+            n = len(smiles_list)
+            batches = [
+                list(range(i, min(i + batch_size, n)))
+                for i in range(0, n, batch_size)
+            ]
         loader = DataLoader(
             dataset,
-            batch_size=batch_size,
+            batch_sampler=batches,
             num_workers=num_workers,
-            shuffle=False,
-            pin_memory=True,
+            pin_memory=self.device.type == 'cuda',
             collate_fn=partial(collate_fn, self.tokenizer, max_length=self.max_length),
         )
-        all_cls, all_mean = [], []
         with torch.no_grad():
-            for batch in loader:
+            for idx, batch in zip(batches, loader):
                 batch_to_device = {
                     k: v.to(self.device, non_blocking=True) for k, v in batch.items()
                 }
                 outputs = self.model(**batch_to_device)
                 hidden = outputs.last_hidden_state
-                cls_emb = hidden[:, 0, :]
-                mean_emb = hidden.mean(dim=1)
-                all_cls.append(cls_emb.cpu())
-                all_mean.append(mean_emb.cpu())
-                emb_cls = torch.cat(all_cls, axis=0).numpy()
-                emb_mean = torch.cat(all_mean, axis=0).numpy()
-        return emb_cls, emb_mean
-
-    def featurize_pure(self, df_pure):
+                mask = batch_to_device['attention_mask']
+                pooled = {
+                    name: pool(hidden, mask, name).float().cpu().numpy()
+                    for name in poolings
+                }
+                yield np.asarray(idx), pooled
+
+    @staticmethod
+    def _allocate(n, dim, out_dir, name):
+        shape = (n, dim)
+        if out_dir is None:
+            return np.empty(shape, dtype=np.float32)
+        os.makedirs(out_dir, exist_ok=True)
+        return np.lib.format.open_memmap(
+            os.path.join(out_dir, f'{name}.npy'),
+            mode='w+',
+            dtype=np.float32,
+            shape=shape,
+        )
+
+    def featurize(
+        self,
+        smiles_list,
+        batch_size=512,
+        num_workers=2,
+        out_dir=None,
+        bucket_by_length=False,
+        pooling=None,
+    ):
+        # Sem ``pooling`` retorna (cls, mean); caso contrário um único array.
+        # Saídas pré-alocadas (ou memmap em ``out_dir``) preenchidas por lote.
+        poolings = ('cls', 'mean') if pooling is None else (pooling,)
+        n = len(smiles_list)
+        outputs = {
+            name: self._allocate(
+                n, pooled_dim(self.hidden, name), out_dir, f'emb_{name}'
+            )
+            for name in poolings
+        }
+        kwargs = dict(
+            batch_size=batch_size,
+            num_workers=num_workers,
+            bucket_by_length=bucket_by_length,
+            poolings=poolings,
+        )
+        if not self._store_fits(poolings):
+            for idx, pooled in self.iter_featurize(smiles_list, **kwargs):
+                for name, emb in pooled.items():
+                    outputs[name][idx] = emb
+        else:
+            self._featurize_with_store(smiles_list, outputs, **kwargs)
+        if out_dir is not None:
+            for emb in outputs.values():
+                emb.flush()
+        if pooling is not None:
+            return outputs[pooling]
+        return outputs['cls'], outputs['mean']
+
+    def _store_fits(self, poolings):
+        # O store tem largura fixa; poolings de outra largura (ex.: 'concat')
+        # são calculados sem ele em vez de gravar linhas truncadas.
+        if self.store is None:
+            return False
+        dims = {pooled_dim(self.hidden, name) for name in poolings}
+        return len(dims) == 1 and self.store.dim in {None, *dims}
+
+    def _store_key(self, smiles, name):
+        return (self.model_name, '', smiles, name)
+
+    def _featurize_with_store(self, smiles_list, outputs, poolings, **kwargs):
+        # Só as moléculas distintas ausentes do store passam pelo encoder;
+        # os vetores novos são persistidos e tudo é espalhado para as linhas.
+        # Chave = string exata codificada (a mesma do caminho sem store).
+        uniques, inverse = np.unique(
+            np.asarray(smiles_list, dtype=object), return_inverse=True
+        )
+        rows = {
+            name: self.store.get_many([self._store_key(s, name) for s in uniques])
+            for name in poolings
+        }
+        missing = [
+            i
+            for i in range(len(uniques))
+            if any(rows[name][i] is None for name in poolings)
+        ]
+        if missing:
+            miss_smiles = [uniques[i] for i in missing]
+            for idx, pooled in self.iter_featurize(
+                miss_smiles, poolings=poolings, **kwargs
+            ):
+                for name, emb in pooled.items():
+                    self.store.put_many(
+                        [self._store_key(miss_smiles[j], name) for j in idx], emb
+                    )
+                    for j, vec in zip(idx, emb):
+                        rows[name][missing[j]] = vec
+        for name in poolings:
+            outputs[name][:] = np.stack(rows[name])[inverse.reshape(-1)]
+
+    def featurize_pure(self, df_pure, pooling='cls'):
         smiles = df_pure['MOL'].tolist()
-        emb_cls, _ = self.featurize(smiles)
-        df_emb = pd.DataFrame(emb_cls).add_prefix('emb_')
+        emb = self.featurize(smiles, pooling=pooling)
+        df_emb = pd.DataFrame(emb).add_prefix('emb_')
         df_emb['T'] = df_pure['T'].values
         df_emb['logV'] = df_pure['logV'].values
         return df_emb
 
-    def featurize_mix(self, df_mix):
-        smiles1 = df_mix['MOL_1'].tolist()
-        smiles2 = df_mix['MOL_2'].tolist()
-
-        emb1, _ = self.featurize(smiles1)
-        emb2, _ = self.featurize(smiles2)
-        df_emb1 = pd.DataFrame(emb1).add_prefix('mol1_')
-        df_emb2 = pd.DataFrame(emb2).add_prefix('mol2_')
-
-        mix_1 = pd.concat([df_emb1, df_emb2], axis=1)
-        mix_1['frac'] = df_mix['MolFrac_1'].values
-        mix_1['T'] = df_mix['T'].values
-        mix_1['logV'] = df_mix['logV'].values
-
-        df_emb1_inv = df_emb2.copy()
-        df_emb2_inv = df_emb1.copy()
-        df_emb1_inv.columns = df_emb1.columns
-        df_emb2_inv.columns = df_emb2.columns
-        mix_2 = pd.concat([df_emb1_inv, df_emb2_inv], axis=1)
-        mix_2['frac'] = 1.0 - df_mix['MolFrac_1'].values
-        mix_2['T'] = df_mix['T'].values
-        mix_2['logV'] = df_mix['logV'].values
-        mix_features = pd.concat([mix_1, mix_2], axis=0).reset_index(drop=True)
-
-        return mix_features
+    def featurize_mix(self, df_mix, pooling='cls', as_view=False):
+        # Cada molécula distinta é codificada uma vez; a orientação trocada
+        # é montada sob demanda pela visão simétrica, sem cópias.
+        n = len(df_mix)
+        smiles = df_mix['MOL_1'].tolist() + df_mix['MOL_2'].tolist()
+        uniques, inverse = np.unique(
+            np.asarray(smiles, dtype=object), return_inverse=True
+        )
+        emb = self.featurize(list(uniques), pooling=pooling)
+        inverse = inverse.reshape(-1)
+        view = SymmetricMixtureView(
+            emb,
+            emb,
+            frac=df_mix['MolFrac_1'].to_numpy(),
+            extra=df_mix['T'].to_numpy(),
+            target=df_mix['logV'].to_numpy(),
+            index_1=inverse[:n],
+            index_2=inverse[n:],
+            extra_names=['T'],
+        )
+        return view if as_view else view.to_frame()
@@ -1,7 +1,31 @@
+import os
+
 import pytorch_lightning as pl
-from torch.utils.data import DataLoader
+import torch
+from torch.utils.data import (
+    BatchSampler,
+    DataLoader,
+    RandomSampler,
+    SequentialSampler,
+)
+
+from chemai.dataset import (
+    BaseSMILESDataset,
+    EmbeddingDataset,
+    MoleculeTableDataset,
+    batch_collate,
+    encode_cls,
+    identity_collate,
+)
+from chemai.sampler import LengthBucketSampler
+from chemai.token_cache import TokenCache
+
+MAX_AUTO_WORKERS = 4
 
-from chemai.dataset import BaseSMILESDataset
+
+def auto_num_workers():
+    # Deixa um núcleo para o processo de treino.
+    return min(MAX_AUTO_WORKERS, max((os.cpu_count() or 1) - 1, 0))
 
 
 class ChemBERTDataModule(pl.LightningDataModule):
@@ -13,6 +37,16 @@ class ChemBERTDataModule(pl.LightningDataModule):
         test_data=None,
         batch_size=64,
         max_length=128,
+        dynamic_padding=True,
+        bucket_by_length=False,
+        frozen_encoder=None,
+        embedding_batch_size=256,
+        molecule_table=False,
+        token_cache_dir=None,
+        num_workers=None,
+        pin_memory=None,
+        persistent_workers=None,
+        prefetch_factor=None,
     ):
         super().__init__()
 
@@ -22,11 +56,53 @@ class ChemBERTDataModule(pl.LightningDataModule):
         self.tokenizer = tokenizer
         self.batch_size = batch_size
         self.max_length = max_length
+        self.dynamic_padding = dynamic_padding
+        self.bucket_by_length = bucket_by_length
+        # Com um encoder congelado os CLS são calculados uma única vez por
+        # SMILES distinto e o modelo treina só a MLP sobre eles.
+        self.frozen_encoder = frozen_encoder
+        self.embedding_batch_size = embedding_batch_size
+        # Tokeniza cada molécula distinta uma vez; as linhas guardam só ids.
+        self.molecule_table = molecule_table
+        # Tokens persistidos em .npy e reaproveitados entre execuções/trials.
+        self.token_cache = TokenCache(token_cache_dir) if token_cache_dir else None
+        # None = automático: workers pelo número de CPUs, pin_memory com CUDA.
+        self.num_workers = auto_num_workers() if num_workers is None else num_workers
+        self.pin_memory = (
+            torch.cuda.is_available() if pin_memory is None else pin_memory
+        )
+        self.persistent_workers = (
+            self.num_workers > 0 if persistent_workers is None else persistent_workers
+        )
+        self.prefetch_factor = prefetch_factor
+
+    def _build_embedding_dataset(self, data, is_pure):
+        smiles_1 = list(data['smiles'] if is_pure else data['smiles_1'])
+        smiles = smiles_1 if is_pure else smiles_1 + list(data['smiles_2'])
+        embeddings, inverse = encode_cls(
+            self.frozen_encoder,
+            self.tokenizer,
+            smiles,
+            max_length=self.max_length,
+            batch_size=self.embedding_batch_size,
+        )
+        n = len(smiles_1)
+        return EmbeddingDataset(
+            embeddings,
+            inverse[:n],
+            temperatures=data['temperatures'],
+            index_2=None if is_pure else inverse[n:],
+            frac=None if is_pure else data['frac'],
+            y=data['y'],
+        )
 
     def _build_dataset(self, data):
         is_pure = 'smiles_2' not in data or data['smiles_2'] is None
+        if self.frozen_encoder is not None:
+            return self._build_embedding_dataset(data, is_pure)
+        dataset_cls = MoleculeTableDataset if self.molecule_table else BaseSMILESDataset
         if is_pure:
-            return BaseSMILESDataset(
+            return dataset_cls(
                 tokenizer=self.tokenizer,
                 smiles_1=data['smiles'],
                 temperatures=data['temperatures'],
@@ -34,8 +110,9 @@ class ChemBERTDataModule(pl.LightningDataModule):
                 smiles_2=None,
                 frac=None,
                 max_length=self.max_length,
+                token_cache=self.token_cache,
             )
-        return BaseSMILESDataset(
+        return dataset_cls(
             tokenizer=self.tokenizer,
             smiles_1=data['smiles_1'],
             smiles_2=data['smiles_2'],
@@ -43,6 +120,7 @@ class ChemBERTDataModule(pl.LightningDataModule):
             frac=data['frac'],
             y=data['y'],
             max_length=self.max_length,
+            token_cache=self.token_cache,
         )
 
     def setup(self, stage=None):
@@ -53,23 +131,42 @@ class ChemBERTDataModule(pl.LightningDataModule):
         if stage == 'test':
             self.test_ds = self._build_dataset(self.test_data)
 
-    def train_dataloader(self):
+    def _loader_kwargs(self):
+        kwargs = {'num_workers': self.num_workers, 'pin_memory': self.pin_memory}
+        if self.num_workers > 0:
+            kwargs['persistent_workers'] = self.persistent_workers
+            kwargs['prefetch_factor'] = self.prefetch_factor
+        return kwargs
+
+    def _dataloader(self, dataset, shuffle):
+        # O sampler entrega a lista de índices do lote e o dataset a resolve
+        # numa única indexação dos tensores (batch_size=None desativa o
+        # empilhamento amostra a amostra do default_collate).
+        if self.bucket_by_length and not isinstance(dataset, EmbeddingDataset):
+            sampler = LengthBucketSampler(
+                dataset.lengths, self.batch_size, shuffle=shuffle
+            )
+        else:
+            order = RandomSampler(dataset) if shuffle else SequentialSampler(dataset)
+            sampler = BatchSampler(order, self.batch_size, drop_last=False)
+        collate = (
+            batch_collate
+            if self.dynamic_padding and not isinstance(dataset, EmbeddingDataset)
+            else identity_collate
+        )
         return DataLoader(
-            self.train_ds,
-            batch_size=self.batch_size,
-            shuffle=True,
+            dataset,
+            sampler=sampler,
+            batch_size=None,
+            collate_fn=collate,
+            **self._loader_kwargs(),
         )
 
+    def train_dataloader(self):
+        return self._dataloader(self.train_ds, shuffle=True)
+
     def val_dataloader(self):
-        return DataLoader(
-            self.dev_ds,
-            batch_size=self.batch_size,
-            shuffle=False,
-        )
+        return self._dataloader(self.dev_ds, shuffle=False)
 
     def test_dataloader(self):
-        return DataLoader(
-            self.test_ds,
-            batch_size=self.batch_size,
-            shuffle=False,
-        )
+        return self._dataloader(self.test_ds, shuffle=False)
@@ -1,6 +1,56 @@
+import numpy as np
 import torch
+from peft import PeftModel
 from torch.utils.data import Dataset
 
+from chemai.sampler import LengthBucketSampler
+
+
+def trim_padding(batch):
+    # Remove as colunas finais que são padding em todo o lote (padding à
+    # direita). Os dois componentes mantêm o mesmo comprimento.
+    masks = [batch[k] for k in ('attention_mask_1', 'attention_mask_2') if k in batch]
+    used = torch.stack([m.any(dim=0) for m in masks]).any(dim=0)
+    length = int(used.nonzero().max()) + 1 if used.any() else 1
+    for key in ('input_ids_1', 'attention_mask_1', 'input_ids_2', 'attention_mask_2'):
+        if key in batch:
+            batch[key] = batch[key][:, :length]
+    return batch
+
+
+def tokenize(tokenizer, smiles, max_length=128, cache=None):
+    """
+    Tokeniza com padding fixo e retorna ``(input_ids, attention_mask)`` em
+    numpy compacto (ids int16/int32, máscara bool). Com um ``TokenCache`` o
+    resultado é lido do disco quando já existe.
+    """
+    key = None if cache is None else cache.key(tokenizer, smiles, max_length)
+    cached = None if cache is None else cache.get(key)
+    if cached is not None:
+        return cached
+    enc = tokenizer(
+        list(smiles),
+        padding='max_length',
+        truncation=True,
+        max_length=max_length,
+    )
+    ids = np.asarray(enc['input_ids'])
+    dtype = np.int16 if ids.max(initial=0) <= np.iinfo(np.int16).max else np.int32
+    ids = ids.astype(dtype)
+    mask = np.asarray(enc['attention_mask'], dtype=bool)
+    if cache is not None:
+        cache.put(key, ids, mask)
+    return ids, mask
+
+
+def batch_collate(batch):
+    # O dataset já devolve o lote montado (indexado por lista de índices).
+    return trim_padding(batch)
+
+
+def identity_collate(batch):
+    return batch
+
 
 class BaseSMILESDataset(Dataset):
     def __init__(
@@ -12,26 +62,17 @@ class BaseSMILESDataset(Dataset):
         frac=None,
         y=None,
         max_length=128,
+        token_cache=None,
     ):
-        enc1 = tokenizer(
-            smiles_1,
-            padding='max_length',
-            truncation=True,
-            max_length=max_length,
-        )
-        self.input_ids_1 = torch.tensor(enc1['input_ids'], dtype=torch.long)
-        self.att_mask_1 = torch.tensor(enc1['attention_mask'], dtype=torch.long)
+        ids_1, mask_1 = tokenize(tokenizer, smiles_1, max_length, token_cache)
+        self.input_ids_1 = torch.tensor(ids_1, dtype=torch.long)
+        self.att_mask_1 = torch.tensor(mask_1, dtype=torch.long)
 
         self.has_smiles2 = smiles_2 is not None
         if self.has_smiles2:
-            enc2 = tokenizer(
-                smiles_2,
-                padding='max_length',
-                truncation=True,
-                max_length=max_length,
-            )
-            self.input_ids_2 = torch.tensor(enc2['input_ids'], dtype=torch.long)
-            self.att_mask_2 = torch.tensor(enc2['attention_mask'], dtype=torch.long)
+            ids_2, mask_2 = tokenize(tokenizer, smiles_2, max_length, token_cache)
+            self.input_ids_2 = torch.tensor(ids_2, dtype=torch.long)
+            self.att_mask_2 = torch.tensor(mask_2, dtype=torch.long)
         self.temperatures = torch.tensor(temperatures, dtype=torch.float)
         self.frac = None if frac is None else torch.tensor(frac, dtype=torch.float)
         self.y = None if y is None else torch.tensor(y, dtype=torch.float)
@@ -39,6 +80,13 @@ class BaseSMILESDataset(Dataset):
     def __len__(self):
         return len(self.input_ids_1)
 
+    @property
+    def lengths(self):
+        lengths = self.att_mask_1.sum(dim=1)
+        if self.has_smiles2:
+            lengths = torch.maximum(lengths, self.att_mask_2.sum(dim=1))
+        return lengths.numpy()
+
     def __getitem__(self, idx):
         item = {
             'input_ids_1': self.input_ids_1[idx],
@@ -53,3 +101,144 @@ class BaseSMILESDataset(Dataset):
         if self.y is not None:
             item['y'] = self.y[idx]
         return item
+
+
+class MoleculeTableDataset(Dataset):
+    """
+    Dataset que tokeniza cada SMILES distinto uma única vez.
+
+    Os tokens ficam numa tabela compacta (int16 quando o vocabulário cabe,
+    senão int32) com uma linha por molécula; cada amostra guarda apenas os
+    índices das moléculas, temperatura, fração e alvo. ``__getitem__``
+    aceita um índice ou uma lista deles: o batch sampler do datamodule
+    entrega o lote inteiro e ele sai de uma única indexação da tabela.
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        smiles_1,
+        temperatures,
+        smiles_2=None,
+        frac=None,
+        y=None,
+        max_length=128,
+        token_cache=None,
+    ):
+        smiles_1 = list(smiles_1)
+        smiles = smiles_1 if smiles_2 is None else smiles_1 + list(smiles_2)
+        uniques, inverse = np.unique(
+            np.asarray(smiles, dtype=object), return_inverse=True
+        )
+        ids, mask = tokenize(tokenizer, uniques, max_length, token_cache)
+        self.token_ids = torch.from_numpy(ids)
+        self.token_mask = torch.from_numpy(mask)
+
+        inverse = torch.from_numpy(inverse.reshape(-1).astype(np.int32))
+        n = len(smiles_1)
+        self.index_1 = inverse[:n]
+        self.has_smiles2 = smiles_2 is not None
+        self.index_2 = inverse[n:] if self.has_smiles2 else None
+        self.temperatures = torch.tensor(temperatures, dtype=torch.float)
+        self.frac = None if frac is None else torch.tensor(frac, dtype=torch.float)
+        self.y = None if y is None else torch.tensor(y, dtype=torch.float)
+
+    def __len__(self):
+        return len(self.index_1)
+
+    @property
+    def lengths(self):
+        mol_lengths = self.token_mask.sum(dim=1)
+        lengths = mol_lengths[self.index_1]
+        if self.has_smiles2:
+            lengths = torch.maximum(lengths, mol_lengths[self.index_2])
+        return lengths.numpy()
+
+    def __getitem__(self, idx):
+        mol_1 = self.index_1[idx]
+        item = {
+            'input_ids_1': self.token_ids[mol_1].long(),
+            'attention_mask_1': self.token_mask[mol_1].long(),
+            'temperatures': self.temperatures[idx],
+        }
+        if self.has_smiles2:
+            mol_2 = self.index_2[idx]
+            item['input_ids_2'] = self.token_ids[mol_2].long()
+            item['attention_mask_2'] = self.token_mask[mol_2].long()
+        if self.frac is not None:
+            item['frac'] = self.frac[idx]
+        if self.y is not None:
+            item['y'] = self.y[idx]
+        return item
+
+
+@torch.no_grad()
+def encode_cls(encoder, tokenizer, smiles, max_length=128, batch_size=256):
+    """
+    Calcula o embedding CLS de cada SMILES distinto com o encoder congelado.
+
+    Retorna ``(embeddings, inverse)``: ``embeddings[inverse]`` reconstrói uma
+    linha por SMILES de entrada.
+    """
+    if isinstance(encoder, PeftModel):
+        raise ValueError(
+            'Embeddings pré-computados exigem encoder congelado (sem LoRA).'
+        )
+    uniques, inverse = np.unique(
+        np.asarray(smiles, dtype=object), return_inverse=True
+    )
+    device = next(encoder.parameters(), torch.empty(0)).device
+    was_training = encoder.training
+    encoder.eval()
+    cls = [None] * len(uniques)
+    for chunk in LengthBucketSampler([len(s) for s in uniques], batch_size):
+        enc = tokenizer(
+            [uniques[i] for i in chunk],
+            padding='longest',
+            truncation=True,
+            max_length=max_length,
+        )
+        out = encoder(
+            input_ids=torch.as_tensor(enc['input_ids'], device=device),
+            attention_mask=torch.as_tensor(enc['attention_mask'], device=device),
+        )
+        for i, c in zip(chunk, out.last_hidden_state[:, 0, :].float().cpu()):
+            cls[i] = c
+    encoder.train(was_training)
+    return torch.stack(cls), torch.as_tensor(inverse.reshape(-1))
+
+
+class EmbeddingDataset(Dataset):
+    """
+    Dataset com embeddings CLS já calculados (treino apenas da MLP).
+
+    ``embeddings`` guarda um vetor por molécula distinta; ``index_1`` e
+    ``index_2`` apontam a linha de cada componente da amostra.
+    """
+
+    def __init__(
+        self, embeddings, index_1, temperatures, index_2=None, frac=None, y=None
+    ):
+        self.embeddings = embeddings
+        self.index_1 = index_1
+        self.index_2 = index_2
+        self.has_smiles2 = index_2 is not None
+        self.temperatures = torch.tensor(temperatures, dtype=torch.float)
+        self.frac = None if frac is None else torch.tensor(frac, dtype=torch.float)
+        self.y = None if y is None else torch.tensor(y, dtype=torch.float)
+
+    def __len__(self):
+        return len(self.index_1)
+
+    def __getitem__(self, idx):
+        item = {
+            'emb_1': self.embeddings[self.index_1[idx]],
+            'temperatures': self.temperatures[idx],
+        }
+        if self.has_smiles2:
+            item['emb_2'] = self.embeddings[self.index_2[idx]]
+        if self.frac is not None:
+            item['frac'] = self.frac[idx]
+        if self.y is not None:
+            item['y'] = self.y[idx]
+        return item
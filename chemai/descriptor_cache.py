@@ -0,0 +1,76 @@
+import json
+import sqlite3
+import threading
+
+from chemai.embedding_cache import canonical_smiles
+
+SQLITE_MAX_VARIABLES = 500
+
+
+def molecule_key(smiles):
+    """
+    SMILES canônico da molécula, a mesma chave da deduplicação.
+
+    O InChIKey padrão funde tautômeros (ex.: ``Oc1ccccn1`` e
+    ``O=c1cccc[nH]1``), cujos descritores RDKit diferem.
+    """
+    return canonical_smiles(smiles)
+
+
+class DescriptorCache:
+    """Cache em memória dos descritores RDKit por SMILES canônico."""
+
+    def __init__(self):
+        self._data = {}
+
+    def get_many(self, keys):
+        return {key: self._data[key] for key in keys if key in self._data}
+
+    def put_many(self, items):
+        self._data.update(items)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteDescriptorCache:
+    """Cache persistente dos descritores em SQLite (SMILES canônico -> JSON)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS descriptors '
+                '(key TEXT PRIMARY KEY, features TEXT NOT NULL)'
+            )
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                chunk = keys[i : i + SQLITE_MAX_VARIABLES]
+                placeholders = ', '.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    'SELECT key, features FROM descriptors '
+                    f'WHERE key IN ({placeholders})',
+                    chunk,
+                )
+                found.update((key, json.loads(feats)) for key, feats in rows)
+        return found
+
+    def put_many(self, items):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO descriptors VALUES (?, ?)',
+                [(key, json.dumps(feats)) for key, feats in items.items()],
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM descriptors').fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+
+from rdkit import Chem
+
+
+def canonical_smiles(smiles):
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return smiles
+    return Chem.MolToSmiles(mol)
+
+
+class EmbeddingCache:
+    """
+    Cache LRU, thread-safe, de vetores CLS por (modelo, SMILES canônico).
+
+    O limite é dado por número de entradas (``max_entries``) e/ou por memória
+    ocupada pelos tensores (``max_bytes``); ``None`` desativa o respectivo limite.
+    """
+
+    def __init__(self, max_entries=4096, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    @staticmethod
+    def _sizeof(tensor):
+        return tensor.element_size() * tensor.nelement()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        value = value.detach().clone()
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.nbytes -= self._sizeof(old)
+            self._data[key] = value
+            self.nbytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._data and (
+            (self.max_entries is not None and len(self._data) > self.max_entries)
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            _, old = self._data.popitem(last=False)
+            self.nbytes -= self._sizeof(old)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self.nbytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
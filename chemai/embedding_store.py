@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+ADAPTER_CONFIG = 'adapter_config.json'
+ADAPTER_WEIGHTS = ('adapter_model.safetensors', 'adapter_model.bin')
+
+
+def adapter_hash(model_dir):
+    """Hash curto do adapter LoRA, config + pesos ('' para modelos sem adapter)."""
+    config = os.path.join(model_dir, ADAPTER_CONFIG) if model_dir else ''
+    if not config or not os.path.exists(config):
+        return ''
+    weights = [
+        os.path.join(model_dir, name)
+        for name in ADAPTER_WEIGHTS
+        if os.path.exists(os.path.join(model_dir, name))
+    ]
+    if not weights:
+        # Sem pesos o hash não distingue adapters e o store misturaria vetores.
+        raise FileNotFoundError(
+            f'Adapter LoRA em {model_dir} sem {" ou ".join(ADAPTER_WEIGHTS)}.'
+        )
+    digest = hashlib.sha256()
+    for path in (config, *weights):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            for block in iter(lambda f=f: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class EmbeddingStore:
+    """
+    Armazenamento persistente e append-only de embeddings moleculares.
+
+    Cada chave é uma tupla ``(modelo, hash do adapter, SMILES, pooling)``
+    convertida para ``str`` e gravada no índice como a linha
+    ``'modelo\\thash\\tSMILES\\tpooling\\tlinha'``; o SMILES é a string exata
+    passada ao encoder (canônica só quando o chamador canonicaliza).
+    Os vetores ficam num arquivo binário lido via ``np.memmap`` e o índice
+    num arquivo texto; cada escrita grava primeiro as linhas do binário e só
+    depois as do índice, de modo que leitores em outros processos (workers
+    do uvicorn, notebooks) nunca enxergam uma chave sem o vetor
+    correspondente. Escritores concorrentes são serializados com ``flock``.
+    """
+
+    def __init__(self, path, dim=None, dtype='float32'):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._meta_path = os.path.join(path, 'meta.json')
+        self._data_path = os.path.join(path, 'embeddings.bin')
+        self._index_path = os.path.join(path, 'index.tsv')
+        self._lock_path = os.path.join(path, '.lock')
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self._index = {}
+        self._index_offset = 0
+        self._rows = 0
+        self._mmap = None
+        self._lock = threading.RLock()
+        self._load_meta()
+        self.refresh()
+
+    def _load_meta(self):
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if self.dim is not None and self.dim != meta['dim']:
+            raise ValueError(
+                f'Dimensão {self.dim} incompatível com o store ({meta["dim"]}).'
+            )
+        if np.dtype(meta['dtype']) != self.dtype:
+            raise ValueError(
+                f'dtype {self.dtype} incompatível com o store ({meta["dtype"]}).'
+            )
+        self.dim = meta['dim']
+
+    def _write_meta(self):
+        with open(self._meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'dim': self.dim, 'dtype': self.dtype.name}, f)
+
+    @property
+    def _row_bytes(self):
+        return self.dim * self.dtype.itemsize
+
+    @contextmanager
+    def _file_lock(self):
+        with self._lock, open(self._lock_path, 'a+b') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _normalize_key(key):
+        return tuple(str(part) for part in key)
+
+    def refresh(self):
+        """Lê as entradas do índice gravadas por outros processos."""
+        with self._lock:
+            if not os.path.exists(self._index_path):
+                return
+            if os.path.getsize(self._index_path) == self._index_offset:
+                return
+            if self.dim is None:
+                self._load_meta()
+            with open(self._index_path, 'rb') as f:
+                f.seek(self._index_offset)
+                chunk = f.read()
+            # Uma linha sem '\n' ainda está sendo escrita; fica para depois.
+            complete = chunk[: chunk.rfind(b'\n') + 1]
+            for line in complete.decode('utf-8').splitlines():
+                *key, row = line.split('\t')
+                self._index[tuple(key)] = int(row)
+                self._rows = max(self._rows, int(row) + 1)
+            self._index_offset += len(complete)
+
+    def _array(self):
+        if self._mmap is None or len(self._mmap) < self._rows:
+            rows = os.path.getsize(self._data_path) // self._row_bytes
+            self._mmap = np.memmap(
+                self._data_path, dtype=self.dtype, mode='r', shape=(rows, self.dim)
+            )
+        return self._mmap
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        self.refresh()
+        return self._normalize_key(key) in self._index
+
+    def get_many(self, keys):
+        """Retorna uma lista com a linha (view do memmap) ou ``None`` por chave."""
+        self.refresh()
+        with self._lock:
+            keys = [self._normalize_key(key) for key in keys]
+            if not any(key in self._index for key in keys):
+                return [None] * len(keys)
+            data = self._array()
+            return [
+                data[self._index[key]] if key in self._index else None
+                for key in keys
+            ]
+
+    def put_many(self, keys, values):
+        values = np.asarray(values)
+        if len(keys) == 0:
+            return
+        with self._file_lock():
+            self.refresh()
+            if self.dim is None:
+                self.dim = values.shape[1]
+                self._write_meta()
+            if values.shape[1:] != (self.dim,):
+                raise ValueError(
+                    f'Vetores de shape {values.shape} incompatíveis com a '
+                    f'dimensão do store ({self.dim}).'
+                )
+            keys = [self._normalize_key(key) for key in keys]
+            new = {}
+            for key, value in zip(keys, values):
+                if key not in self._index and key not in new:
+                    new[key] = value
+            if not new:
+                return
+            size = (
+                os.path.getsize(self._data_path)
+                if os.path.exists(self._data_path)
+                else 0
+            )
+            start = size // self._row_bytes
+            with open(self._data_path, 'r+b' if size else 'wb') as f:
+                # Descarta uma escrita parcial interrompida.
+                f.truncate(start * self._row_bytes)
+                f.seek(start * self._row_bytes)
+                f.write(np.stack(list(new.values())).astype(self.dtype).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            lines = ''.join(
+                '\t'.join((*key, str(start + i))) + '\n' for i, key in enumerate(new)
+            )
+            with open(self._index_path, 'a', encoding='utf-8', newline='\n') as f:
+                f.write(lines)
+            self.refresh()
@@ -1,3 +1,10 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from collections.abc import Iterator
+from itertools import zip_longest
+
 import numpy as np
 import pandas as pd
 from pandas import DataFrame
@@ -9,10 +16,27 @@ COL_T = 'T'
 COL_LOGV = 'logV'
 COL_MOL = 'MOL'
 
+RAW_COLUMNS = [COL_MOL1, COL_MOL2, COL_FRAC, COL_T, COL_LOGV]
+SPLIT_FILES = {
+    'train': ('data.csv', 'data_features.csv'),
+    'test': ('test.csv', 'test_features.csv'),
+}
+SOURCE_FILES = ('data.csv', 'data_features.csv', 'test.csv', 'test_features.csv')
+CHUNK_SIZE = 100_000
+# Incrementar quando _normalize/_split_pure_mix mudarem (invalida o cache).
+CACHE_VERSION = 1
+
 
 class DipprDatasetLoader:
-    def __init__(self, data_dir: str = '../data/nist_dippr_data'):
+    def __init__(
+        self,
+        data_dir: str = '../data/nist_dippr_data',
+        cache_dir: str | None = None,
+        use_cache: bool = True,
+    ):
         self.data_dir = data_dir
+        self.cache_dir = cache_dir or os.path.join(data_dir, '.cache')
+        self.use_cache = use_cache
 
         self.train_raw: DataFrame | None = None
         self.test_raw: DataFrame | None = None
@@ -41,6 +65,46 @@ class DipprDatasetLoader:
         d.loc[mask_sort, COL_FRAC] = 1.0 - d.loc[mask_sort, COL_FRAC].values
         return d
 
+    @staticmethod
+    def _normalize_vectorized(df: DataFrame, tol: float = 1e-8) -> DataFrame:
+        """
+        Mesma semântica de ``_normalize`` (a referência), sem cópia do
+        DataFrame nem atribuições ``.loc``: os SMILES viram códigos de um
+        vocabulário ordenado, de modo que comparar códigos equivale a
+        comparar as strings, e cada coluna é montada uma vez com ``np.where``.
+        """
+        # Fatoriza cada coluna e ordena só o vocabulário (moléculas distintas).
+        codes_1, uniques_1 = pd.factorize(df[COL_MOL1])
+        codes_2, uniques_2 = pd.factorize(df[COL_MOL2])
+        vocab = np.unique(np.concatenate([uniques_1, uniques_2]).astype(str))
+        lookup_1 = np.append(np.searchsorted(vocab, uniques_1.astype(str)), -1)
+        lookup_2 = np.append(np.searchsorted(vocab, uniques_2.astype(str)), -1)
+        mol1, mol2 = lookup_1[codes_1], lookup_2[codes_2]
+        frac = df[COL_FRAC].to_numpy(dtype=np.float64)
+        is_one = np.isclose(frac, 1.0, atol=tol, rtol=0.0)
+        is_zero = np.isclose(frac, 0.0, atol=tol, rtol=0.0)
+        # x=1 → puro em MOL_1; x=0 → puro em MOL_2, movido para MOL_1.
+        mol1 = np.where(is_zero, mol2, mol1)
+        mol2 = np.where(is_one | is_zero, -1, mol2)
+        frac = np.where(is_zero, 1.0, frac)
+        # Misturas em ordem canônica: MOL_1 < MOL_2.
+        swap = (mol2 >= 0) & (mol1 > mol2)
+        mol1, mol2 = np.where(swap, mol2, mol1), np.where(swap, mol1, mol2)
+        frac = np.where(swap, 1.0 - frac, frac)
+
+        vocab = pd.Index(vocab, dtype=object)
+        out = {}
+        for col in df.columns:
+            if col == COL_MOL1:
+                out[col] = pd.Categorical.from_codes(mol1, categories=vocab)
+            elif col == COL_MOL2:
+                out[col] = pd.Categorical.from_codes(mol2, categories=vocab)
+            elif col == COL_FRAC:
+                out[col] = frac
+            else:
+                out[col] = df[col]
+        return DataFrame(out, index=df.index)
+
     @staticmethod
     def _split_pure_mix(df: DataFrame) -> tuple[DataFrame, DataFrame]:
         pure = (
@@ -57,25 +121,139 @@ class DipprDatasetLoader:
         self.train_raw = (
             pd.concat([train_feat, train_data], axis=1)
             .dropna()
-            .reset_index(drop=True)[[COL_MOL1, COL_MOL2, COL_FRAC, COL_T, COL_LOGV]]
+            .reset_index(drop=True)[RAW_COLUMNS]
         )
         test_data = pd.read_csv(f'{self.data_dir}/test.csv')
         test_feat = pd.read_csv(f'{self.data_dir}/test_features.csv')
         self.test_raw = (
             pd.concat([test_feat, test_data], axis=1)
             .dropna()
-            .reset_index(drop=True)[[COL_MOL1, COL_MOL2, COL_FRAC, COL_T, COL_LOGV]]
+            .reset_index(drop=True)[RAW_COLUMNS]
         )
 
+    @staticmethod
+    def _compact(df: DataFrame) -> DataFrame:
+        # SMILES categóricos e numéricos float32: menos memória e Parquet menor.
+        d = df.copy()
+        for col in (COL_MOL, COL_MOL1, COL_MOL2):
+            if col in d:
+                d[col] = d[col].astype(object).astype('category')
+        for col in (COL_FRAC, COL_T, COL_LOGV):
+            if col in d:
+                d[col] = d[col].astype(np.float32)
+        return d
+
+    def source_hash(self) -> str:
+        digest = hashlib.sha256(f'v{CACHE_VERSION}'.encode())
+        for name in SOURCE_FILES:
+            digest.update(name.encode())
+            with open(os.path.join(self.data_dir, name), 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        return digest.hexdigest()[:16]
+
+    def _cache_path(self) -> str:
+        return os.path.join(self.cache_dir, f'dippr_{self.source_hash()}')
+
+    def _load_cache(self, path: str) -> bool:
+        if not os.path.isdir(path):
+            return False
+        self.pure = {}
+        self.mix = {}
+        for split in ('train', 'test'):
+            self.pure[split] = pd.read_parquet(
+                f'{path}/{split}_pure.parquet', memory_map=True
+            )
+            self.mix[split] = pd.read_parquet(
+                f'{path}/{split}_mix.parquet', memory_map=True
+            )
+        return True
+
+    def _save_cache(self, path: str) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=self.cache_dir)
+        for split in ('train', 'test'):
+            self.pure[split].to_parquet(f'{tmp}/{split}_pure.parquet', index=False)
+            self.mix[split].to_parquet(f'{tmp}/{split}_mix.parquet', index=False)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # Outro processo gravou o mesmo cache primeiro.
+            shutil.rmtree(tmp, ignore_errors=True)
+
     def prepare(self) -> None:
+        # Só usa o cache quando o próprio loader lê os CSVs: frames atribuídos
+        # pelo chamador não têm relação com o hash dos arquivos em disco.
+        path = None
         if self.train_raw is None or self.test_raw is None:
+            path = self._cache_path() if self.use_cache else None
+            if path is not None and self._load_cache(path):
+                return
             self.load_raw()
-        self.train_norm = self._normalize(self.train_raw)
-        self.test_norm = self._normalize(self.test_raw)
+        self.train_norm = self._normalize_vectorized(self.train_raw)
+        self.test_norm = self._normalize_vectorized(self.test_raw)
         train_pure, train_mix = self._split_pure_mix(self.train_norm)
         test_pure, test_mix = self._split_pure_mix(self.test_norm)
-        self.pure = {'train': train_pure, 'test': test_pure}
-        self.mix = {'train': train_mix, 'test': test_mix}
+        self.pure = {
+            'train': self._compact(train_pure),
+            'test': self._compact(test_pure),
+        }
+        self.mix = {'train': self._compact(train_mix), 'test': self._compact(test_mix)}
+        if path is not None:
+            self._save_cache(path)
+
+    def iter_chunks(
+        self, split: str = 'train', chunksize: int = CHUNK_SIZE
+    ) -> Iterator[tuple[DataFrame, DataFrame]]:
+        """
+        Lê o par de CSVs do split em blocos de ``chunksize`` linhas, lado a
+        lado, e gera ``(pure, mix)`` já normalizados para cada bloco.
+
+        A memória depende só de ``chunksize``, não do tamanho dos arquivos.
+        """
+        data_file, feat_file = SPLIT_FILES[split]
+        readers = [
+            pd.read_csv(
+                os.path.join(self.data_dir, name),
+                usecols=lambda col: col in RAW_COLUMNS,
+                chunksize=chunksize,
+            )
+            for name in (data_file, feat_file)
+        ]
+        with readers[0] as data_chunks, readers[1] as feat_chunks:
+            for data, feat in zip_longest(data_chunks, feat_chunks):
+                if data is None or feat is None or len(data) != len(feat):
+                    raise ValueError(
+                        f'{data_file} e {feat_file} têm números de linhas diferentes.'
+                    )
+                raw = pd.concat([feat, data], axis=1).dropna()[RAW_COLUMNS]
+                pure, mix = self._split_pure_mix(self._normalize_vectorized(raw))
+                yield self._compact(pure), self._compact(mix)
+
+    def write_partitioned(
+        self, out_dir: str, split: str = 'train', chunksize: int = CHUNK_SIZE
+    ) -> dict[str, int]:
+        """
+        Grava os blocos de ``iter_chunks`` como ``{split}_pure/part-*.parquet``
+        e ``{split}_mix/part-*.parquet``; cada diretório pode ser lido de
+        volta com ``pd.read_parquet``. Retorna o número de linhas por tabela.
+        """
+        counts = {'pure': 0, 'mix': 0}
+        for kind in counts:
+            os.makedirs(os.path.join(out_dir, f'{split}_{kind}'), exist_ok=True)
+        for i, chunk in enumerate(self.iter_chunks(split, chunksize)):
+            for kind, df in zip(counts, chunk, strict=True):
+                if df.empty:
+                    continue
+                # Categorias diferem entre blocos; o Parquet já codifica os
+                # SMILES em dicionário por arquivo.
+                smiles = df.select_dtypes('category').columns
+                df.astype(dict.fromkeys(smiles, object)).to_parquet(
+                    os.path.join(out_dir, f'{split}_{kind}', f'part-{i:05d}.parquet'),
+                    index=False,
+                )
+                counts[kind] += len(df)
+        return counts
 
     def get_pure(self) -> dict[str, DataFrame]:
         if not self.pure:
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+
+class SymmetricMixtureView:
+    """
+    Visão das duas orientações de uma mistura sem duplicar as features.
+
+    As linhas ``0..n-1`` são ``(mol1, mol2, frac, extras)`` e as linhas
+    ``n..2n-1`` a orientação trocada ``(mol2, mol1, 1 - frac, extras)``,
+    montadas sob demanda a partir de uma única matriz por componente.
+    ``index_1``/``index_2`` permitem que várias linhas compartilhem a mesma
+    linha de features (uma por molécula distinta).
+    """
+
+    def __init__(
+        self,
+        mol1,
+        mol2,
+        frac,
+        extra=None,
+        target=None,
+        index_1=None,
+        index_2=None,
+        feature_names=None,
+        extra_names=(),
+        prefixes=('mol1_', 'mol2_'),
+    ):
+        self.mol1 = np.asarray(mol1)
+        self.mol2 = np.asarray(mol2)
+        # A matriz de ``take`` mantém o dtype das features (ex.: embeddings
+        # float32); frac e extras ficam em float64 e assim saem em ``to_frame``.
+        self.dtype = np.result_type(self.mol1.dtype, np.float32)
+        self.frac = np.asarray(frac, dtype=np.float64)
+        self.n = len(self.frac)
+        self.index_1 = np.arange(self.n) if index_1 is None else np.asarray(index_1)
+        self.index_2 = np.arange(self.n) if index_2 is None else np.asarray(index_2)
+        self.extra = (
+            np.empty((self.n, 0))
+            if extra is None
+            else np.asarray(extra, dtype=np.float64).reshape(self.n, -1)
+        )
+        self.target = None if target is None else np.asarray(target)
+        dim = self.mol1.shape[1]
+        self.feature_names = (
+            [str(i) for i in range(dim)]
+            if feature_names is None
+            else [str(name) for name in feature_names]
+        )
+        self.extra_names = list(extra_names)
+        self.prefixes = prefixes
+
+    @property
+    def columns(self):
+        first, second = self.prefixes
+        return [
+            *(first + name for name in self.feature_names),
+            *(second + name for name in self.feature_names),
+            'frac',
+            *self.extra_names,
+        ]
+
+    @property
+    def shape(self):
+        return len(self), len(self.columns)
+
+    def __len__(self):
+        return 2 * self.n
+
+    def _blocks(self, index):
+        rows = np.atleast_1d(np.arange(len(self))[index])
+        swapped = rows >= self.n
+        base = rows - self.n * swapped
+        first = self.mol1[self.index_1[base]]
+        second = self.mol2[self.index_2[base]]
+        first[swapped], second[swapped] = second[swapped], first[swapped]
+        frac = np.where(swapped, 1.0 - self.frac[base], self.frac[base])
+        y = None if self.target is None else self.target[base]
+        return [first, second, frac[:, None], self.extra[base]], y
+
+    def take(self, index):
+        """Retorna ``(X, y)`` das linhas pedidas (int, slice ou array)."""
+        blocks, y = self._blocks(index)
+        return np.hstack(blocks, dtype=self.dtype), y
+
+    def __getitem__(self, index):
+        x, _ = self.take(index)
+        return x[0] if np.ndim(index) == 0 and not isinstance(index, slice) else x
+
+    def __array__(self, dtype=None, copy=None):  # noqa: PLW3201
+        _ = copy
+        x, _ = self.take(slice(None))
+        return x if dtype is None else x.astype(dtype)
+
+    def iter_batches(self, batch_size, shuffle=False, seed=13):
+        """Gera ``(X, y)`` por lote, montando só as linhas do lote."""
+        order = np.arange(len(self))
+        if shuffle:
+            order = np.random.default_rng(seed).permutation(order)
+        for i in range(0, len(order), batch_size):
+            yield self.take(order[i : i + batch_size])
+
+    def to_frame(self, target_name='logV'):
+        """Materializa as duas orientações (formato antigo de DataFrame)."""
+        blocks, y = self._blocks(slice(None))
+        # Um DataFrame por bloco preserva o dtype de cada grupo de colunas.
+        df = pd.concat(
+            [pd.DataFrame(block) for block in blocks], axis=1, ignore_index=True
+        )
+        df.columns = self.columns
+        if y is not None:
+            df[target_name] = y
+        return df
@@ -2,6 +2,7 @@ import pytorch_lightning as pl
 import torch
 import torchmetrics
 from peft import PeftModel
+from pytorch_lightning.callbacks import GradientAccumulationScheduler
 from torch import nn
 
 
@@ -15,6 +16,9 @@ class ChemBERTModel(pl.LightningModule):
         lr_head=1e-3,
         lr_lora=2e-4,
         weight_decay=1e-4,
+        train_metrics_every_n_steps=1,
+        gradient_checkpointing=False,
+        accumulate_grad_batches=1,
     ):
         super().__init__()
         self.save_hyperparameters(ignore=['base_model'])
@@ -35,6 +39,19 @@ class ChemBERTModel(pl.LightningModule):
                 else:
                     p.requires_grad = False
 
+        # Recalcula as ativações do encoder no backward em vez de guardá-las;
+        # só faz sentido com LoRA (o encoder congelado não tem gradientes).
+        self.gradient_checkpointing = gradient_checkpointing and self.is_lora
+        if self.gradient_checkpointing:
+            if not hasattr(self.base_model, 'gradient_checkpointing_enable'):
+                raise ValueError(
+                    'O modelo base não suporta gradient checkpointing.'
+                )
+            self.base_model.gradient_checkpointing_enable(
+                gradient_checkpointing_kwargs={'use_reentrant': False}
+            )
+        self.accumulate_grad_batches = accumulate_grad_batches
+
         if mode == 'pure':
             mlp_in_dim = self.embedding_dim + 1  # CLS + T
         else:
@@ -49,59 +66,114 @@ class ChemBERTModel(pl.LightningModule):
         self.lr_lora = lr_lora
         self.weight_decay = weight_decay
 
-        self.train_r2 = torchmetrics.R2Score()
-        self.val_r2 = torchmetrics.R2Score()
+        # As métricas acumulam no device do modelo e só são sincronizadas no
+        # fim da época; as de treino podem ser atualizadas a cada k passos.
+        metrics = torchmetrics.MetricCollection({
+            'r2': torchmetrics.R2Score(),
+            'mse': torchmetrics.MeanSquaredError(),
+            'mae': torchmetrics.MeanAbsoluteError(),
+        })
+        self.train_metrics = metrics.clone(prefix='train_')
+        self.val_metrics = metrics.clone(prefix='val_')
+        self.train_metrics_every_n_steps = train_metrics_every_n_steps
 
-    def forward(self, batch):
-        out1 = self.base_model(
-            input_ids=batch['input_ids_1'],
-            attention_mask=batch['attention_mask_1'],
+    def _cls(self, batch, i):
+        # Embeddings pré-computados (encoder congelado) dispensam o encoder.
+        if f'emb_{i}' in batch:
+            if self.is_lora:
+                raise ValueError(
+                    'Embeddings pré-computados não são suportados com LoRA.'
+                )
+            return batch[f'emb_{i}']
+        out = self.base_model(
+            input_ids=batch[f'input_ids_{i}'],
+            attention_mask=batch[f'attention_mask_{i}'],
         )
-        cls1 = out1.last_hidden_state[:, 0, :]
+        return out.last_hidden_state[:, 0, :]
 
-        if self.mode == 'pure':
-            t = batch['temperatures'].unsqueeze(1).float()
-            x = torch.cat([cls1, t], dim=1)
-            return self.mlp(x).squeeze(1)
+    @staticmethod
+    def _pad_to(tensor, length, value):
+        return nn.functional.pad(tensor, (0, length - tensor.shape[1]), value=value)
 
-        out2 = self.base_model(
-            input_ids=batch['input_ids_2'],
-            attention_mask=batch['attention_mask_2'],
+    def _cls_pair(self, batch):
+        """CLS dos dois componentes com uma única passada do encoder."""
+        if 'emb_1' in batch:
+            return self._cls(batch, 1), self._cls(batch, 2)
+        ids1, ids2 = batch['input_ids_1'], batch['input_ids_2']
+        mask1, mask2 = batch['attention_mask_1'], batch['attention_mask_2']
+        length = max(ids1.shape[1], ids2.shape[1])
+        pad_id = getattr(self.base_model.config, 'pad_token_id', None) or 0
+        ids = torch.cat(
+            [self._pad_to(ids1, length, pad_id), self._pad_to(ids2, length, pad_id)]
+        )
+        mask = torch.cat(
+            [self._pad_to(mask1, length, 0), self._pad_to(mask2, length, 0)]
+        )
+        # Moléculas repetidas no lote (ex.: o mesmo solvente) são codificadas
+        # uma única vez; o índice inverso devolve um CLS por linha.
+        unique, inverse = torch.unique(
+            torch.cat([ids, mask], dim=1), dim=0, return_inverse=True
+        )
+        out = self.base_model(
+            input_ids=unique[:, :length], attention_mask=unique[:, length:]
         )
-        cls2 = out2.last_hidden_state[:, 0, :]
+        cls = out.last_hidden_state[:, 0, :][inverse]
+        n = ids1.shape[0]
+        return cls[:n], cls[n:]
+
+    def forward(self, batch):
         t = batch['temperatures'].unsqueeze(1).float()
+        if self.mode == 'pure':
+            x = torch.cat([self._cls(batch, 1), t], dim=1)
+            # Saída em fp32 mesmo sob autocast bf16 (perda e métricas em fp32).
+            return self.mlp(x).squeeze(1).float()
+
+        cls1, cls2 = self._cls_pair(batch)
         f = batch['frac'].unsqueeze(1).float()
 
         x1 = torch.cat([cls1, cls2, t, f], dim=1)
         x2 = torch.cat([cls2, cls1, t, 1 - f], dim=1)
-        y = 0.5 * (self.mlp(x1) + self.mlp(x2))
-        return y.squeeze(1)
+        # As duas orientações da mistura numa única chamada da MLP.
+        y = self.mlp(torch.cat([x1, x2], dim=0)).squeeze(1).float()
+        n = cls1.shape[0]
+        return 0.5 * (y[:n] + y[n:])
 
-    def training_step(self, batch, _):
+    def training_step(self, batch, batch_idx):
         y_hat = self(batch)
-        y = batch['y']
+        y = batch['y'].float()
         loss = torch.nn.functional.mse_loss(y_hat, y)
-        self.train_r2.update(y_hat.detach().cpu(), y.detach().cpu())
+        if batch_idx % self.train_metrics_every_n_steps == 0:
+            self.train_metrics.update(y_hat.detach(), y)
         self.log('train_loss', loss, on_epoch=True, prog_bar=True)
         return loss
 
+    def _log_epoch_metrics(self, metrics):
+        if metrics['r2'].update_called:
+            values = metrics.compute()
+            r2_key = f'{metrics.prefix}r2'
+            self.log(r2_key, values.pop(r2_key), prog_bar=True)
+            self.log_dict(values)
+        metrics.reset()
+
     def on_train_epoch_end(self):
-        r2 = self.train_r2.compute()
-        self.log('train_r2', r2, prog_bar=True)
-        self.train_r2.reset()
+        self._log_epoch_metrics(self.train_metrics)
 
     def validation_step(self, batch, _):
         y_hat = self(batch)
-        y = batch['y']
+        y = batch['y'].float()
         loss = torch.nn.functional.mse_loss(y_hat, y)
-        self.val_r2.update(y_hat.detach().cpu(), y.detach().cpu())
+        self.val_metrics.update(y_hat, y)
         self.log('val_loss', loss, on_epoch=True, prog_bar=True)
         return loss
 
     def on_validation_epoch_end(self):
-        r2 = self.val_r2.compute()
-        self.log('val_r2', r2, prog_bar=True)
-        self.val_r2.reset()
+        self._log_epoch_metrics(self.val_metrics)
+
+    def configure_callbacks(self):
+        if self.accumulate_grad_batches <= 1:
+            return []
+        # Lote efetivo = batch_size * accumulate_grad_batches.
+        return [GradientAccumulationScheduler({0: self.accumulate_grad_batches})]
 
     def configure_optimizers(self):
         params_head = {'params': self.mlp.parameters(), 'lr': self.lr_head}
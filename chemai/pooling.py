@@ -0,0 +1,48 @@
+import torch
+
+
+def cls_pooling(hidden, attention_mask):
+    _ = attention_mask
+    return hidden[:, 0, :]
+
+
+def mean_pooling(hidden, attention_mask):
+    # Média apenas sobre os tokens reais; o padding não altera o resultado.
+    mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+    return (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+
+
+def max_pooling(hidden, attention_mask):
+    mask = attention_mask.unsqueeze(-1).bool()
+    return hidden.masked_fill(~mask, torch.finfo(hidden.dtype).min).amax(dim=1)
+
+
+def concat_pooling(hidden, attention_mask):
+    return torch.cat(
+        [
+            cls_pooling(hidden, attention_mask),
+            mean_pooling(hidden, attention_mask),
+            max_pooling(hidden, attention_mask),
+        ],
+        dim=1,
+    )
+
+
+POOLING_STRATEGIES = {
+    'cls': cls_pooling,
+    'mean': mean_pooling,
+    'max': max_pooling,
+    'concat': concat_pooling,
+}
+
+
+def pool(hidden, attention_mask, strategy='cls'):
+    if strategy not in POOLING_STRATEGIES:
+        raise ValueError(
+            f"Pooling inválido '{strategy}'. Use um de {list(POOLING_STRATEGIES)}."
+        )
+    return POOLING_STRATEGIES[strategy](hidden, attention_mask)
+
+
+def pooled_dim(hidden_size, strategy='cls'):
+    return hidden_size * 3 if strategy == 'concat' else hidden_size
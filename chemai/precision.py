@@ -0,0 +1,22 @@
+import torch
+
+
+def cpu_bf16_supported():
+    """Indica se a CPU executa bf16 nativamente (AMX ou AVX512-BF16)."""
+    checks = ('_is_amx_tile_supported', '_is_avx512_bf16_supported')
+    return any(getattr(torch.cpu, name, lambda: False)() for name in checks)
+
+
+def training_precision(accelerator='auto'):
+    """
+    Valor de ``precision`` para o ``pl.Trainer``.
+
+    Em CPU usa ``'bf16-mixed'`` (autocast bf16, pesos e otimizador em fp32)
+    quando há suporte nativo a bf16; caso contrário mantém ``'32-true'``.
+    """
+    use_cuda = accelerator in {'gpu', 'cuda'} or (
+        accelerator == 'auto' and torch.cuda.is_available()
+    )
+    if use_cuda:
+        return 'bf16-mixed' if torch.cuda.is_bf16_supported() else '16-mixed'
+    return 'bf16-mixed' if cpu_bf16_supported() else '32-true'
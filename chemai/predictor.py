@@ -7,25 +7,66 @@ from sklearn.preprocessing import StandardScaler
 
 from peft import PeftModel
 
+from chemai.embedding_cache import EmbeddingCache, canonical_smiles
+from chemai.embedding_store import adapter_hash
+from chemai.sampler import LengthBucketSampler
+from chemai.validation import combine_reports, validate_smiles
+
 class ChemBERTPredictor:
-    def __init__(self, mode, model_dir, hf_model_name, max_length=128):
+    def __init__(
+        self,
+        mode,
+        model_dir,
+        hf_model_name,
+        max_length=128,
+        cache=None,
+        canonicalize=False,
+        encode_batch_size=256,
+        registry=None,
+        merge_lora=False,
+        store=None,
+    ):
         self.mode = mode
         self.model_dir = model_dir
         self.hf_model_name = hf_model_name
         self.max_length = max_length
+        # O CLS do ChemBERTa depende da string exata e as MLPs foram treinadas
+        # com os SMILES originais do DIPPR; canonicalize=True só aumenta o
+        # reaproveitamento do cache e altera as predições de SMILES não canônicos.
+        self.canonicalize = canonicalize
+        self.encode_batch_size = encode_batch_size
+        self.registry = registry
+        self.merge_lora = merge_lora
+        self.store = store
+        self.cache = cache if cache is not None else EmbeddingCache()
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.tokenizer = self._load_tokenizer()
         self.base_model = self._load_base_model()
         self.mlp = self._load_mlp()
         self.scaler = self._load_scaler()
+        self.model_key = self._model_key()
+        self.adapter_hash = adapter_hash(self.model_dir) if self._is_lora() else ""
     
     def _load_tokenizer(self):
+        if self.registry is not None:
+            return self.registry.get_tokenizer(self.hf_model_name)
         return AutoTokenizer.from_pretrained(self.hf_model_name)
     
     def _is_lora(self):
         return os.path.exists(os.path.join(self.model_dir, "adapter_config.json"))
     
+    def _model_key(self):
+        # Modelos base compartilham embeddings; LoRA depende do adapter.
+        if self._is_lora():
+            return f"{self.hf_model_name}@{os.path.abspath(self.model_dir)}"
+        return self.hf_model_name
+
     def _load_base_model(self):
+        if self.registry is not None:
+            adapter_dir = self.model_dir if self._is_lora() else None
+            return self.registry.get_backbone(
+                self.hf_model_name, adapter_dir=adapter_dir, merge=self.merge_lora
+            )
         base = AutoModel.from_pretrained(self.hf_model_name)
         if self._is_lora():
             return PeftModel.from_pretrained(base, self.model_dir).to(self.device).eval()
@@ -59,6 +100,50 @@ class ChemBERTPredictor:
             return_tensors="pt"
         )
         return {k: v.to(self.device) for k, v in tokens.items()}
+
+    def _store_key(self, smiles):
+        return (self.hf_model_name, self.adapter_hash, smiles, "cls")
+
+    def _embed_smiles(self, smiles_list):
+        # Cada molécula distinta é codificada uma única vez; os vetores CLS
+        # são espalhados de volta para as linhas via índice inverso.
+        uniques, inverse = np.unique(
+            np.asarray(smiles_list, dtype=object), return_inverse=True
+        )
+        if self.canonicalize:
+            canon = [canonical_smiles(s) for s in uniques]
+            uniques, canon_inv = np.unique(
+                np.asarray(canon, dtype=object), return_inverse=True
+            )
+            inverse = canon_inv[inverse]
+        cls = [self.cache.get((self.model_key, s)) for s in uniques]
+        missing = [i for i, c in enumerate(cls) if c is None]
+        if self.store is not None and missing:
+            stored = self.store.get_many([self._store_key(uniques[i]) for i in missing])
+            for i, row in zip(missing, stored):
+                if row is not None:
+                    cls[i] = torch.tensor(np.asarray(row), device=self.device)
+                    self.cache.put((self.model_key, uniques[i]), cls[i])
+            missing = [i for i in missing if cls[i] is None]
+        # Comprimento do SMILES como aproximação do número de tokens.
+        buckets = LengthBucketSampler(
+            [len(uniques[i]) for i in missing], self.encode_batch_size
+        )
+        for bucket in buckets:
+            chunk = [missing[j] for j in bucket]
+            tokens = self._encode_smiles([uniques[i] for i in chunk])
+            out = self.base_model(**tokens)
+            cls_chunk = out.last_hidden_state[:, 0, :]
+            for i, c in zip(chunk, cls_chunk):
+                cls[i] = c
+                self.cache.put((self.model_key, uniques[i]), c)
+            if self.store is not None:
+                self.store.put_many(
+                    [self._store_key(uniques[i]) for i in chunk],
+                    cls_chunk.float().cpu().numpy(),
+                )
+        index = torch.as_tensor(inverse.reshape(-1), device=self.device)
+        return torch.stack(cls)[index]
     
     @torch.no_grad()
     def predict(self, smiles1, smiles2=None, frac=None, temp=None):
@@ -94,25 +179,44 @@ class ChemBERTPredictor:
         else:
             raise ValueError("Modo inválido. Use 'pure' ou 'mix'.")
         
-        tokens1 = self._encode_smiles(smiles1)
-        out1 = self.base_model(**tokens1)
-        cls1 = out1.last_hidden_state[:, 0, :]
-        
         temp_arr = np.array(temp).reshape(-1, 1)
         if self.scaler is not None:
             temp_arr = self.scaler.transform(temp_arr)
         t = torch.tensor(temp_arr, device=self.device, dtype=torch.float32)
         
         if self.mode == "pure":
-            x = torch.cat([cls1, t], dim=1)
+            x = torch.cat([self._embed_smiles(smiles1), t], dim=1)
             y_hat = self.mlp(x).squeeze(1)
         else:
-            tokens2 = self._encode_smiles(smiles2)
-            out2 = self.base_model(**tokens2)
-            cls2 = out2.last_hidden_state[:, 0, :]
+            # Os dois componentes passam juntos pelo encoder.
+            cls1, cls2 = self._embed_smiles(list(smiles1) + list(smiles2)).split(n)
             f = torch.tensor(frac, device=self.device, dtype=torch.float32).unsqueeze(1)
             x1 = torch.cat([cls1, cls2, t, f], dim=1)
             x2 = torch.cat([cls2, cls1, t, 1 - f], dim=1)
-            y_hat = 0.5 * (self.mlp(x1) + self.mlp(x2))
-            y_hat = y_hat.squeeze(1)
-        return y_hat.cpu().numpy()
\ No newline at end of file
+            # As duas orientações da mistura numa única chamada da MLP.
+            y_hat = self.mlp(torch.cat([x1, x2], dim=0)).squeeze(1)
+            y_hat = 0.5 * (y_hat[:n] + y_hat[n:])
+        return y_hat.cpu().numpy()
+
+    def predict_valid(self, smiles1, smiles2=None, frac=None, temp=None):
+        """
+        Prediz apenas as linhas com SMILES válidos.
+
+        Retorna ``(predições, relatório)``; linhas inválidas ficam com NaN e
+        são descritas em ``relatório.failures``.
+        """
+        report = validate_smiles(smiles1)
+        if self.mode == "mix" and smiles2 is not None:
+            report = combine_reports(report, validate_smiles(smiles2))
+        y_hat = np.full(len(report.mask), np.nan, dtype=np.float32)
+        rows = np.flatnonzero(report.mask)
+        if len(rows) == 0:
+            return y_hat, report
+
+        def take(values):
+            return None if values is None else [values[i] for i in rows]
+
+        y_hat[rows] = self.predict(
+            take(smiles1), smiles2=take(smiles2), frac=take(frac), temp=take(temp)
+        )
+        return y_hat, report
@@ -0,0 +1,123 @@
+import os
+import threading
+
+import torch
+from peft import PeftModel
+from transformers import AutoModel, AutoTokenizer
+
+
+class BackboneView:
+    """
+    Visão de um backbone compartilhado com um adapter LoRA específico.
+
+    O modelo é resolvido no registro a cada chamada, pois carregar o primeiro
+    adapter substitui o modelo base por um ``PeftModel`` que o envolve.
+    Chamadas no mesmo backbone são serializadas, já que trocar o adapter ativo
+    altera o estado do modelo.
+    """
+
+    def __init__(self, registry, hf_model_name, adapter_name=None):
+        self.registry = registry
+        self.hf_model_name = hf_model_name
+        self.adapter_name = adapter_name
+
+    @property
+    def model(self):
+        return self.registry._backbones[self.hf_model_name]
+
+    @property
+    def config(self):
+        return self.model.config
+
+    def eval(self):
+        return self
+
+    def __call__(self, **inputs):
+        with self.registry._locks[self.hf_model_name]:
+            model = self.model
+            if not isinstance(model, PeftModel):
+                return model(**inputs)
+            if self.adapter_name is None:
+                with model.disable_adapter():
+                    return model(**inputs)
+            model.set_adapter(self.adapter_name)
+            return model(**inputs)
+
+
+class ModelRegistry:
+    """
+    Carrega pesos e tokenizador do ChemBERTa uma única vez por processo.
+
+    Adapters LoRA são anexados ao mesmo backbone via PEFT; com ``merge=True``
+    o adapter é mesclado numa cópia própria do modelo.
+    """
+
+    def __init__(self, device=None):
+        if device is None:
+            device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.device = device
+        self._tokenizers = {}
+        self._backbones = {}
+        self._adapters = {}
+        self._merged = {}
+        self._locks = {}
+        self._lock = threading.RLock()
+
+    def get_tokenizer(self, hf_model_name):
+        with self._lock:
+            if hf_model_name not in self._tokenizers:
+                self._tokenizers[hf_model_name] = AutoTokenizer.from_pretrained(
+                    hf_model_name
+                )
+            return self._tokenizers[hf_model_name]
+
+    def _load_model(self, hf_model_name):
+        return AutoModel.from_pretrained(hf_model_name).to(self.device).eval()
+
+    def _ensure_backbone(self, hf_model_name):
+        if hf_model_name not in self._backbones:
+            self._backbones[hf_model_name] = self._load_model(hf_model_name)
+            self._locks[hf_model_name] = threading.Lock()
+
+    def _attach_adapter(self, hf_model_name, adapter_dir):
+        key = (hf_model_name, os.path.abspath(adapter_dir))
+        if key in self._adapters:
+            return self._adapters[key]
+        name = f'adapter_{len(self._adapters)}'
+        with self._locks[hf_model_name]:
+            model = self._backbones[hf_model_name]
+            if isinstance(model, PeftModel):
+                model.load_adapter(adapter_dir, adapter_name=name)
+            else:
+                model = PeftModel.from_pretrained(
+                    model, adapter_dir, adapter_name=name
+                )
+                self._backbones[hf_model_name] = model.to(self.device).eval()
+        self._adapters[key] = name
+        return name
+
+    def _merged_model(self, hf_model_name, adapter_dir):
+        key = (hf_model_name, os.path.abspath(adapter_dir))
+        if key not in self._merged:
+            base = AutoModel.from_pretrained(hf_model_name)
+            merged = PeftModel.from_pretrained(base, adapter_dir).merge_and_unload()
+            self._merged[key] = merged.to(self.device).eval()
+        return self._merged[key]
+
+    def get_backbone(self, hf_model_name, adapter_dir=None, merge=False):
+        with self._lock:
+            if adapter_dir is not None and merge:
+                return self._merged_model(hf_model_name, adapter_dir)
+            self._ensure_backbone(hf_model_name)
+            adapter_name = None
+            if adapter_dir is not None:
+                adapter_name = self._attach_adapter(hf_model_name, adapter_dir)
+            return BackboneView(self, hf_model_name, adapter_name)
+
+    def loaded(self):
+        with self._lock:
+            return {
+                'backbones': list(self._backbones),
+                'adapters': [path for _, path in self._adapters],
+                'merged': [path for _, path in self._merged],
+            }
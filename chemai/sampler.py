@@ -0,0 +1,73 @@
+import numpy as np
+from torch.utils.data import Sampler
+
+
+class LengthBucketSampler(Sampler):
+    """
+    Batch sampler que agrupa SMILES de comprimento (em tokens) semelhante.
+
+    Com ``shuffle=False`` os índices são ordenados globalmente por
+    comprimento. Com ``shuffle=True`` os índices são embaralhados, divididos
+    em baldes de ``batch_size * bucket_size`` elementos, ordenados dentro de
+    cada balde e os lotes resultantes são embaralhados, preservando a
+    aleatoriedade entre épocas.
+    """
+
+    def __init__(
+        self,
+        lengths,
+        batch_size,
+        shuffle=False,
+        bucket_size=50,
+        drop_last=False,
+        seed=13,
+    ):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.bucket_size = bucket_size
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _batches(self, order):
+        batches = [
+            order[i : i + self.batch_size]
+            for i in range(0, len(order), self.batch_size)
+        ]
+        if self.drop_last and batches and len(batches[-1]) < self.batch_size:
+            batches.pop()
+        return batches
+
+    def __iter__(self):
+        if not self.shuffle:
+            order = np.argsort(self.lengths, kind='stable')
+            yield from (b.tolist() for b in self._batches(order))
+            return
+        rng = np.random.default_rng(self.seed + self.epoch)
+        self.epoch += 1
+        perm = rng.permutation(len(self.lengths))
+        chunk = self.batch_size * self.bucket_size
+        batches = []
+        for i in range(0, len(perm), chunk):
+            bucket = perm[i : i + chunk]
+            bucket = bucket[np.argsort(self.lengths[bucket], kind='stable')]
+            batches.extend(self._batches(bucket))
+        for j in rng.permutation(len(batches)):
+            yield batches[j].tolist()
+
+    def __len__(self):
+        n = len(self.lengths)
+        if not self.shuffle:
+            return n // self.batch_size if self.drop_last else -(-n // self.batch_size)
+        chunk = self.batch_size * self.bucket_size
+        total = 0
+        for i in range(0, n, chunk):
+            size = min(chunk, n - i)
+            total += size // self.batch_size
+            if not self.drop_last and size % self.batch_size:
+                total += 1
+        return total
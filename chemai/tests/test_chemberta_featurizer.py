@@ -1,9 +1,42 @@
 import numpy as np
 import pandas as pd
 import pytest
+import torch
 import transformers
+from transformers import BertConfig, BertModel
 
+from chemai import chemberta_featurizer as featurizer_module
 from chemai.chemberta_featurizer import ChemBERTaFeaturizer
+from chemai.embedding_store import EmbeddingStore
+
+
+class DummyTokenizer:
+    def __call__(
+        self, smiles, truncation, padding, max_length, return_tensors=None
+    ):
+        _ = truncation
+        ids = [[1] + [ord(c) % 40 + 3 for c in s][: max_length - 1] for s in smiles]
+        if padding is False:
+            return {'input_ids': ids}
+        size = max_length if padding == 'max_length' else max(map(len, ids))
+        input_ids = torch.zeros(len(ids), size, dtype=torch.long)
+        mask = torch.zeros(len(ids), size, dtype=torch.long)
+        for row, seq in enumerate(ids):
+            input_ids[row, : len(seq)] = torch.tensor(seq)
+            mask[row, : len(seq)] = 1
+        return {'input_ids': input_ids, 'attention_mask': mask}
+
+
+def tiny_bert(*_, **__):
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=48,
+        hidden_size=8,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=16,
+    )
+    return BertModel(config)
 
 
 # ---------------------------------------------------------
@@ -41,6 +74,134 @@ def featurizer_cpu():
     return fe
 
 
+@pytest.fixture
+def featurizer_tiny(monkeypatch):
+    """Featurizer com modelo BERT minúsculo, sem acesso ao HuggingFace."""
+    monkeypatch.setattr(
+        featurizer_module.AutoTokenizer,
+        'from_pretrained',
+        lambda *_, **__: DummyTokenizer(),
+    )
+    monkeypatch.setattr(featurizer_module.AutoModel, 'from_pretrained', tiny_bert)
+    return ChemBERTaFeaturizer(device='cpu', max_length=16)
+
+
+# ---------------------------------------------------------
+# Testes: featurize (streaming / memmap)
+# ---------------------------------------------------------
+SMILES = ['CCO', 'O', 'CCC', 'c1ccccc1', 'CC(=O)O', 'N']
+
+
+def test_featurize_preallocated_matches_batches(featurizer_tiny):
+    emb_cls, emb_mean = featurizer_tiny.featurize(
+        SMILES, batch_size=4, num_workers=0
+    )
+    assert emb_cls.shape == (len(SMILES), featurizer_tiny.hidden)
+    assert emb_cls.dtype == np.float32
+    single, _ = featurizer_tiny.featurize(SMILES, batch_size=1, num_workers=0)
+    assert np.allclose(emb_cls, single, atol=1e-5)
+    assert np.isfinite(emb_mean).all()
+
+
+def test_iter_featurize_yields_batch_indices(featurizer_tiny):
+    indices = [
+        idx.tolist()
+        for idx, _ in featurizer_tiny.iter_featurize(
+            SMILES, batch_size=4, num_workers=0
+        )
+    ]
+    assert indices == [[0, 1, 2, 3], [4, 5]]
+
+
+def test_featurize_dynamic_padding_and_buckets_keep_cls(featurizer_tiny):
+    padded = featurizer_tiny.tokenizer(
+        SMILES, truncation=True, padding='max_length', max_length=16
+    )
+    with torch.no_grad():
+        expected = featurizer_tiny.model(**padded).last_hidden_state[:, 0, :]
+    emb_cls, _ = featurizer_tiny.featurize(
+        SMILES, batch_size=2, num_workers=0, bucket_by_length=True
+    )
+    assert np.allclose(emb_cls, expected.numpy(), atol=1e-5)
+
+
+def test_featurize_to_memmap(featurizer_tiny, tmp_path):
+    emb_cls, _ = featurizer_tiny.featurize(
+        SMILES, batch_size=4, num_workers=0, out_dir=str(tmp_path)
+    )
+    stored = np.load(tmp_path / 'emb_cls.npy', mmap_mode='r')
+    assert np.array_equal(stored, emb_cls)
+
+
+def test_featurize_mean_pooling_ignores_padding(featurizer_tiny):
+    _, emb_mean = featurizer_tiny.featurize(SMILES, batch_size=6, num_workers=0)
+    single = []
+    for smiles in SMILES:
+        _, mean = featurizer_tiny.featurize([smiles], batch_size=1, num_workers=0)
+        single.append(mean[0])
+    assert np.allclose(emb_mean, np.stack(single), atol=1e-5)
+
+
+@pytest.mark.parametrize(('pooling', 'factor'), [('max', 1), ('concat', 3)])
+def test_featurize_pooling_strategies(featurizer_tiny, pooling, factor):
+    emb = featurizer_tiny.featurize(SMILES, num_workers=0, pooling=pooling)
+    assert emb.shape == (len(SMILES), factor * featurizer_tiny.hidden)
+
+
+def test_featurize_pure_accepts_pooling(featurizer_tiny):
+    df = pd.DataFrame({'MOL': ['CCO', 'O'], 'T': [300.0, 350.0], 'logV': [1, 2]})
+    feat = featurizer_tiny.featurize_pure(df, pooling='mean')
+    assert feat.shape == (2, featurizer_tiny.hidden + 2)
+
+
+def test_featurize_with_store_encodes_only_new_molecules(featurizer_tiny, tmp_path):
+    expected_cls, expected_mean = featurizer_tiny.featurize(SMILES, num_workers=0)
+    featurizer_tiny.store = EmbeddingStore(str(tmp_path))
+    emb_cls, emb_mean = featurizer_tiny.featurize(SMILES + SMILES, num_workers=0)
+    assert len(featurizer_tiny.store) == 2 * len(SMILES)
+    assert np.allclose(emb_cls[: len(SMILES)], expected_cls, atol=1e-5)
+    assert np.allclose(emb_mean[len(SMILES) :], expected_mean, atol=1e-5)
+
+    def fail(*_, **__):
+        raise AssertionError('encoder não deveria ser chamado')
+
+    featurizer_tiny.model = fail
+    again = featurizer_tiny.featurize(['CCO', 'O'], num_workers=0, pooling='cls')
+    assert np.allclose(again, expected_cls[:2], atol=1e-5)
+
+
+def test_featurize_with_store_encodes_smiles_as_given(featurizer_tiny, tmp_path):
+    # 'OCC' não é canônico; o store não pode trocá-lo por 'CCO'.
+    smiles = ['OCC', 'CCO']
+    expected = featurizer_tiny.featurize(smiles, num_workers=0, pooling='cls')
+    featurizer_tiny.store = EmbeddingStore(str(tmp_path))
+    emb = featurizer_tiny.featurize(smiles, num_workers=0, pooling='cls')
+    assert np.allclose(emb, expected, atol=1e-5)
+
+
+def test_featurize_concat_does_not_write_to_store(featurizer_tiny, tmp_path):
+    featurizer_tiny.store = EmbeddingStore(str(tmp_path))
+    featurizer_tiny.featurize(SMILES, num_workers=0, pooling='cls')
+    concat = featurizer_tiny.featurize(SMILES, num_workers=0, pooling='concat')
+    assert concat.shape == (len(SMILES), 3 * featurizer_tiny.hidden)
+    assert len(featurizer_tiny.store) == len(SMILES)
+
+
+def test_featurize_mix_swaps_components(featurizer_tiny, df_mix):
+    feat = featurizer_tiny.featurize_mix(df_mix)
+    n = len(df_mix)
+    mol1 = [c for c in feat.columns if c.startswith('mol1_')]
+    mol2 = [c for c in feat.columns if c.startswith('mol2_')]
+    assert np.array_equal(
+        feat[mol1].to_numpy()[n:], feat[mol2].to_numpy()[:n]
+    )
+    view = featurizer_tiny.featurize_mix(df_mix, as_view=True)
+    # A matriz da visão usa o dtype dos embeddings; a tabela mantém T em fp64.
+    expected = feat.drop(columns='logV').to_numpy(dtype=np.float32)
+    assert np.array_equal(np.asarray(view), expected)
+    assert feat['T'].dtype == np.float64
+
+
 # ---------------------------------------------------------
 # Testes: featurize_pure
 # ---------------------------------------------------------
@@ -1,5 +1,12 @@
+import torch
+
 from chemai.datamodule import ChemBERTDataModule
-from chemai.dataset import BaseSMILESDataset
+from chemai.dataset import (
+    BaseSMILESDataset,
+    EmbeddingDataset,
+    MoleculeTableDataset,
+)
+from chemai.model import ChemBERTModel
 
 
 class DummyTokenizer:
@@ -10,6 +17,31 @@ class DummyTokenizer:
         }
 
 
+class CharTokenizer:
+    def __call__(self, smiles, padding, truncation, max_length):
+        _ = truncation
+        ids = [[ord(c) % 20 + 1 for c in s][:max_length] for s in smiles]
+        size = max_length if padding == 'max_length' else max(map(len, ids))
+        return {
+            'input_ids': [seq + [0] * (size - len(seq)) for seq in ids],
+            'attention_mask': [[1] * len(seq) + [0] * (size - len(seq)) for seq in ids],
+        }
+
+
+class CountingEncoder(torch.nn.Module):
+    def __init__(self, hidden=4):
+        super().__init__()
+        self.emb = torch.nn.Embedding(21, hidden)
+        self.config = type('cfg', (), {'hidden_size': hidden})
+        self.rows = 0
+
+    def forward(self, input_ids, attention_mask):
+        self.rows += input_ids.shape[0]
+        hidden = self.emb(input_ids) * attention_mask.unsqueeze(-1)
+        hidden[:, 0, :] = hidden.sum(dim=1)
+        return type('obj', (), {'last_hidden_state': hidden})
+
+
 def test_datamodule_pure():
     train = {
         'smiles_1': ['CCO', 'O'],
@@ -48,3 +80,105 @@ def test_datamodule_mix():
     dm.setup()
     assert dm.train_ds.has_smiles2
     assert 'frac' in dm.train_ds[0]
+
+
+def test_datamodule_bucket_by_length():
+    train = {
+        'smiles_1': ['CCO', 'O', 'CCC', 'N'],
+        'smiles_2': ['C', 'CC', 'O', 'CO'],
+        'temperatures': [300, 350, 320, 310],
+        'frac': [0.1, 0.9, 0.5, 0.3],
+        'y': [1.0, 2.0, 1.5, 1.2],
+    }
+    dm = ChemBERTDataModule(
+        DummyTokenizer(),
+        train_data=train,
+        dev_data=train,
+        batch_size=2,
+        bucket_by_length=True,
+    )
+    dm.setup()
+    batches = list(dm.train_dataloader())
+    assert sum(len(b['y']) for b in batches) == len(train['y'])
+    assert len(list(dm.val_dataloader())) == len(batches)
+
+
+def test_datamodule_frozen_encoder_precomputes_embeddings():
+    torch.manual_seed(0)
+    train = {
+        'smiles_1': ['CCO', 'O', 'CCO', 'CCC'],
+        'smiles_2': ['O', 'CCC', 'CCC', 'O'],
+        'temperatures': [300, 350, 320, 310],
+        'frac': [0.1, 0.9, 0.5, 0.3],
+        'y': [1.0, 2.0, 1.5, 1.2],
+    }
+    encoder = CountingEncoder()
+    dm = ChemBERTDataModule(
+        CharTokenizer(),
+        train_data=train,
+        batch_size=4,
+        max_length=8,
+        frozen_encoder=encoder,
+    )
+    dm.setup('fit')
+    assert isinstance(dm.train_ds, EmbeddingDataset)
+    # Cada SMILES distinto passa pelo encoder uma única vez.
+    assert encoder.rows == len({'CCO', 'O', 'CCC'})
+    batch = next(iter(dm.train_dataloader()))
+    assert set(batch) == {'emb_1', 'emb_2', 'temperatures', 'frac', 'y'}
+
+    model = ChemBERTModel(base_model=encoder, mode='mix')
+    model.eval()
+    tokenized = ChemBERTDataModule(
+        CharTokenizer(), train_data=train, batch_size=4, max_length=8
+    )
+    tokenized.setup('fit')
+    ds = tokenized.train_ds
+    expected = model(ds[list(range(len(ds)))])
+    cached = model(dm.train_ds[list(range(len(ds)))])
+    assert torch.allclose(cached, expected, atol=1e-5)
+
+
+def test_datamodule_molecule_table():
+    train = {
+        'smiles_1': ['CCO', 'O', 'CCC', 'CCO'],
+        'smiles_2': ['C', 'CC', 'O', 'C'],
+        'temperatures': [300, 350, 320, 310],
+        'frac': [0.1, 0.9, 0.5, 0.3],
+        'y': [1.0, 2.0, 1.5, 1.2],
+    }
+    dm = ChemBERTDataModule(
+        CharTokenizer(),
+        train_data=train,
+        batch_size=2,
+        max_length=8,
+        bucket_by_length=True,
+        molecule_table=True,
+    )
+    dm.setup('fit')
+    assert isinstance(dm.train_ds, MoleculeTableDataset)
+    batches = list(dm.train_dataloader())
+    assert sum(len(b['y']) for b in batches) == len(train['y'])
+    assert all(b['input_ids_1'].dtype == torch.long for b in batches)
+
+
+def test_datamodule_loader_options():
+    train = {
+        'smiles_1': ['CCO', 'O', 'CCC'],
+        'smiles_2': ['C', 'CC', 'O'],
+        'temperatures': [300, 350, 320],
+        'frac': [0.1, 0.9, 0.5],
+        'y': [1.0, 2.0, 1.5],
+    }
+    dm = ChemBERTDataModule(
+        CharTokenizer(), train_data=train, batch_size=2, max_length=8, num_workers=2
+    )
+    assert dm.persistent_workers
+    dm.num_workers = 0
+    dm.setup('fit')
+    loader = dm.train_dataloader()
+    assert loader.num_workers == 0
+    # O lote vem de uma indexação única dos tensores do dataset.
+    batches = list(loader)
+    assert [len(b['y']) for b in batches] == [2, 1]
+    assert batches[0]['input_ids_1'].shape[1] <= dm.max_length
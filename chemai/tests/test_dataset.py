@@ -1,4 +1,12 @@
-from chemai.dataset import BaseSMILESDataset
+import torch
+from torch.utils.data import default_collate
+
+from chemai.dataset import (
+    BaseSMILESDataset,
+    MoleculeTableDataset,
+    batch_collate,
+    trim_padding,
+)
 
 
 class DummyTokenizer:
@@ -45,3 +53,58 @@ def test_dataset_mix():
     assert 'input_ids_2' in sample  # MIX
     assert 'frac' in sample
     assert sample['temperatures'] == test_t
+
+
+class PaddingTokenizer:
+    """Tokenizer fake com padding real: um token por caractere."""
+
+    def __call__(self, smiles, padding, truncation, max_length):
+        _ = padding
+        _ = truncation
+        ids = [[2] * min(len(s), max_length) for s in smiles]
+        return {
+            'input_ids': [i + [0] * (max_length - len(i)) for i in ids],
+            'attention_mask': [[1] * len(i) + [0] * (max_length - len(i)) for i in ids],
+        }
+
+
+def test_trim_padding_trims_common_padding():
+    ds = BaseSMILESDataset(
+        PaddingTokenizer(),
+        smiles_1=['CCO', 'O'],
+        smiles_2=['CCCCC', 'C'],
+        temperatures=[300, 400],
+        frac=[0.2, 0.8],
+        max_length=16,
+    )
+    assert ds.lengths.tolist() == [5, 1]
+    batch = trim_padding(default_collate([ds[0], ds[1]]))
+    assert batch['input_ids_1'].shape == (2, 5)
+    assert batch['input_ids_2'].shape == (2, 5)
+    assert torch.equal(batch['attention_mask_1'][0], torch.tensor([1, 1, 1, 0, 0]))
+
+
+def test_molecule_table_matches_base_dataset():
+    kwargs = {
+        'smiles_1': ['CCO', 'O', 'CCO', 'CCCC'],
+        'smiles_2': ['O', 'CCO', 'CCCC', 'O'],
+        'temperatures': [300, 400, 350, 320],
+        'frac': [0.2, 0.8, 0.5, 0.1],
+        'y': [1.0, 2.0, 3.0, 4.0],
+        'max_length': 8,
+    }
+    base = BaseSMILESDataset(PaddingTokenizer(), **kwargs)
+    table = MoleculeTableDataset(PaddingTokenizer(), **kwargs)
+    # Uma linha de tokens por molécula distinta, em int16.
+    assert table.token_ids.shape == (len({'CCO', 'O', 'CCCC'}), 8)
+    assert table.token_ids.dtype == torch.int16
+    assert table.lengths.tolist() == base.lengths.tolist()
+    for key, value in base[1].items():
+        assert torch.equal(table[1][key], value)
+
+    indices = [3, 0, 2]
+    batch = batch_collate(table[indices])
+    expected = trim_padding(default_collate([base[i] for i in indices]))
+    assert batch.keys() == expected.keys()
+    for key, value in expected.items():
+        assert torch.equal(batch[key], value)
@@ -0,0 +1,46 @@
+import torch
+
+from chemai.embedding_cache import EmbeddingCache, canonical_smiles
+
+
+def test_canonical_smiles():
+    assert canonical_smiles('OCC') == canonical_smiles('CCO')
+    # SMILES inválido é mantido como chave
+    assert canonical_smiles('xx') == 'xx'
+
+
+def test_cache_hit_miss_counters():
+    cache = EmbeddingCache(max_entries=4)
+    assert cache.get(('m', 'CCO')) is None
+    cache.put(('m', 'CCO'), torch.ones(3))
+    assert torch.equal(cache.get(('m', 'CCO')), torch.ones(3))
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['entries'] == 1
+
+
+def test_cache_lru_eviction_by_entries():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put('a', torch.zeros(2))
+    cache.put('b', torch.zeros(2))
+    cache.get('a')  # 'b' passa a ser o menos usado
+    cache.put('c', torch.zeros(2))
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert cache.stats()['evictions'] == 1
+
+
+def test_cache_eviction_by_bytes():
+    cache = EmbeddingCache(max_entries=None, max_bytes=8 * 4)
+    for key in 'abc':
+        cache.put(key, torch.zeros(4, dtype=torch.float32))
+    assert len(cache) == cache.max_bytes // (4 * 4)
+    assert cache.nbytes <= cache.max_bytes
+
+
+def test_cache_stores_detached_copy():
+    hidden = torch.randn(2, 5, 3)
+    cache = EmbeddingCache()
+    cache.put('a', hidden[:, 0, :][0])
+    assert cache.get('a').untyped_storage().nbytes() == 3 * 4
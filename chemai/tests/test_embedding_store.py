@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pytest
+
+from chemai.embedding_store import EmbeddingStore, adapter_hash
+
+
+def test_store_roundtrip(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    values = np.arange(6, dtype=np.float32).reshape(2, 3)
+    store.put_many([('m', '', 'CCO', 'cls'), ('m', '', 'CCC', 'cls')], values)
+    assert len(store) == len(values)
+    assert ('m', '', 'CCO', 'cls') in store
+    rows = store.get_many([('m', '', 'CCC', 'cls'), ('m', '', 'CO', 'cls')])
+    assert np.array_equal(rows[0], values[1])
+    assert rows[1] is None
+
+
+def test_store_skips_existing_keys(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    store.put_many([('m', '', 'CCO', 'cls')], np.ones((1, 2)))
+    store.put_many([('m', '', 'CCO', 'cls')], np.zeros((1, 2)))
+    assert len(store) == 1
+    assert np.array_equal(store.get_many([('m', '', 'CCO', 'cls')])[0], [1, 1])
+
+
+def test_store_visible_to_other_instances(tmp_path):
+    reader = EmbeddingStore(str(tmp_path))
+    writer = EmbeddingStore(str(tmp_path))
+    values = np.ones((1, 4))
+    writer.put_many([('m', '', 'CCO', 'cls')], values)
+    assert reader.get_many([('m', '', 'CCO', 'cls')])[0] is not None
+    writer.put_many([('m', '', 'CCC', 'cls')], np.full((1, 4), 2.0))
+    assert np.array_equal(reader.get_many([('m', '', 'CCC', 'cls')])[0], [2] * 4)
+    reopened = EmbeddingStore(str(tmp_path))
+    assert len(reopened) == len(writer)
+    assert reopened.dim == values.shape[1]
+
+
+def test_store_ignores_partial_index_line(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    store.put_many([('m', '', 'CCO', 'cls')], np.ones((1, 2)))
+    with open(tmp_path / 'index.tsv', 'a', encoding='utf-8') as f:
+        f.write('m\t\tCCC\tcls')  # escrita ainda em andamento
+    assert len(EmbeddingStore(str(tmp_path))) == 1
+
+
+def test_store_rejects_incompatible_dim_and_dtype(tmp_path):
+    EmbeddingStore(str(tmp_path)).put_many([('m', '', 'C', 'cls')], np.ones((1, 3)))
+    with pytest.raises(ValueError, match='Dimensão'):
+        EmbeddingStore(str(tmp_path), dim=5)
+    with pytest.raises(ValueError, match='dtype'):
+        EmbeddingStore(str(tmp_path), dtype='float16')
+
+
+def test_store_rejects_vectors_of_other_width(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    store.put_many([('m', '', 'C', 'cls')], np.ones((1, 4)))
+    with pytest.raises(ValueError, match='incompatíveis'):
+        store.put_many([('m', '', 'C', 'concat')], np.ones((1, 12)))
+    assert len(store) == 1
+    assert os.path.getsize(tmp_path / 'embeddings.bin') == 4 * store.dtype.itemsize
+
+
+def test_adapter_hash(tmp_path):
+    assert not adapter_hash(str(tmp_path))
+    (tmp_path / 'adapter_config.json').write_text('{"r": 8}')
+    with pytest.raises(FileNotFoundError):
+        adapter_hash(str(tmp_path))
+    (tmp_path / 'adapter_model.safetensors').write_bytes(b'pesos')
+    first = adapter_hash(str(tmp_path))
+    assert first.isalnum()
+    (tmp_path / 'adapter_model.safetensors').write_bytes(b'outros pesos')
+    assert adapter_hash(str(tmp_path)) != first
+
+
+def test_adapter_hash_bin_and_config(tmp_path):
+    (tmp_path / 'adapter_config.json').write_text('{"r": 8}')
+    (tmp_path / 'adapter_model.bin').write_bytes(b'pesos')
+    first = adapter_hash(str(tmp_path))
+    (tmp_path / 'adapter_config.json').write_text('{"r": 16}')
+    assert adapter_hash(str(tmp_path)) != first
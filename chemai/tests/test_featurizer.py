@@ -3,7 +3,12 @@ import pandas as pd
 import pytest
 from rdkit import Chem
 
-from chemai.chem_featurizer import ChemFeaturizer
+from chemai.chem_featurizer import FEATURE_NAMES, INTEGER_FEATURES, ChemFeaturizer
+from chemai.descriptor_cache import (
+    DescriptorCache,
+    SQLiteDescriptorCache,
+    molecule_key,
+)
 
 # ---------------------------------------------------------
 # Fixtures
@@ -95,3 +100,189 @@ def test_featurize_mix_parallel(featurizer, df_mix):
     orig = df_mix['MolFrac_1'].values
     expected_fracs = set(orig) | set(1 - orig)
     assert set(feat_mix['frac'].values) == expected_fracs
+
+
+# ---------------------------------------------------------
+# Deduplicação e cache de descritores
+# ---------------------------------------------------------
+@pytest.fixture
+def counting_features(monkeypatch):
+    calls = []
+    original = ChemFeaturizer.get_feature_vector
+
+    def counting(mol, out=None):
+        calls.append(Chem.MolToSmiles(mol))
+        return original(mol, out)
+
+    monkeypatch.setattr(
+        ChemFeaturizer, 'get_feature_vector', staticmethod(counting)
+    )
+    return calls
+
+
+def test_featurize_pure_computes_each_molecule_once(counting_features):
+    df = pd.DataFrame({
+        'MOL': ['CCO', 'OCC', 'O', 'CCO'],
+        'T': [300.0, 310.0, 320.0, 330.0],
+        'logV': [1.0, 1.1, 0.5, 0.9],
+    })
+    feat_df = ChemFeaturizer().featurize_pure(df, n_jobs=1)
+    assert sorted(counting_features) == ['CCO', 'O']
+    expected = pd.DataFrame([
+        ChemFeaturizer.get_features(Chem.MolFromSmiles(s)) for s in df['MOL']
+    ])
+    assert np.allclose(
+        feat_df[expected.columns].to_numpy(float), expected.to_numpy(float)
+    )
+
+
+def test_featurize_mix_shares_descriptors_between_components(
+    counting_features, df_mix
+):
+    feat_mix = ChemFeaturizer().featurize_mix_parallel(df_mix, n_jobs=1)
+    assert len(counting_features) == len(set(df_mix['MOL_1']) | set(df_mix['MOL_2']))
+    n = len(df_mix)
+    expected = [
+        ChemFeaturizer.get_features(Chem.MolFromSmiles(s))['tpsa']
+        for s in df_mix['MOL_2']
+    ]
+    assert np.allclose(feat_mix['mol2_tpsa'].to_numpy()[:n], expected)
+
+
+def test_descriptor_cache_skips_known_molecules(counting_features, df_pure):
+    featurizer = ChemFeaturizer(cache=DescriptorCache())
+    first = featurizer.featurize_pure(df_pure, n_jobs=1)
+    counting_features.clear()
+    second = featurizer.featurize_pure(df_pure, n_jobs=1)
+    assert not counting_features
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_sqlite_descriptor_cache_persists(tmp_path, counting_features, df_pure):
+    path = str(tmp_path / 'descritores.sqlite')
+    cache = SQLiteDescriptorCache(path)
+    first = ChemFeaturizer(cache=cache).featurize_pure(df_pure, n_jobs=1)
+    cache.close()
+    counting_features.clear()
+    reopened = SQLiteDescriptorCache(path)
+    assert len(reopened) == len(df_pure)
+    second = ChemFeaturizer(cache=reopened).featurize_pure(df_pure, n_jobs=1)
+    assert not counting_features
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_molecule_key_is_canonical_smiles():
+    assert molecule_key('CCO') == molecule_key('OCC')
+    # Tautômeros compartilham o InChIKey, mas não os descritores.
+    assert molecule_key('Oc1ccccn1') != molecule_key('O=c1cccc[nH]1')
+
+
+def test_descriptor_cache_keeps_tautomers_apart():
+    smiles = ['Oc1ccccn1', 'O=c1cccc[nH]1']
+    expected, _, _ = ChemFeaturizer().unique_features(smiles, n_jobs=1)
+    cached, _, _ = ChemFeaturizer(cache=DescriptorCache()).unique_features(
+        smiles, n_jobs=1
+    )
+    pd.testing.assert_frame_equal(cached, expected)
+    assert cached['tpsa'].nunique() == len(smiles)
+
+
+def test_feature_vector_follows_feature_names():
+    mol = Chem.MolFromSmiles('CC(=O)O')
+    vector = ChemFeaturizer.get_feature_vector(mol)
+    assert vector.shape == (len(FEATURE_NAMES),)
+    feats = ChemFeaturizer.get_features(mol)
+    assert tuple(feats) == FEATURE_NAMES
+    assert feats['has_acid'] == 1.0
+    out = np.zeros((2, len(FEATURE_NAMES)))
+    ChemFeaturizer.get_feature_vector(mol, out=out[1])
+    assert np.array_equal(out[1], vector, equal_nan=True)
+
+
+def test_featurize_pure_columns_in_feature_order(featurizer, df_pure):
+    feat_df = featurizer.featurize_pure(df_pure, n_jobs=1)
+    assert tuple(feat_df.columns[: len(FEATURE_NAMES)]) == FEATURE_NAMES
+
+
+def test_chunked_workers_match_single_chunk(df_mix):
+    smiles = list(df_mix['MOL_1']) + list(df_mix['MOL_2']) + ['CCCCO', 'c1ccccc1']
+    single, _, _ = ChemFeaturizer(chunk_size=len(smiles)).unique_features(
+        smiles, n_jobs=1
+    )
+    chunked, _, _ = ChemFeaturizer(chunk_size=2).unique_features(smiles, n_jobs=2)
+    pd.testing.assert_frame_equal(single, chunked)
+
+
+def test_featurize_mix_swaps_components(featurizer, df_mix):
+    feat_mix = featurizer.featurize_mix_parallel(df_mix, n_jobs=1)
+    n = len(df_mix)
+    assert np.allclose(
+        feat_mix['mol1_tpsa'].to_numpy()[n:], feat_mix['mol2_tpsa'].to_numpy()[:n]
+    )
+    view = featurizer.featurize_mix_parallel(df_mix, n_jobs=1, as_view=True)
+    assert len(view) == len(feat_mix)
+
+
+# ---------------------------------------------------------
+# SMILES inválidos
+# ---------------------------------------------------------
+def test_featurize_pure_masks_invalid_smiles(counting_features):
+    df = pd.DataFrame({
+        'MOL': ['CCO', 'C1CC', None, 'O', 'C1CC'],
+        'T': [300.0, 310.0, 320.0, 330.0, 340.0],
+        'logV': [1.0, 1.1, 0.5, 0.9, 0.7],
+    })
+    feat_df, report = ChemFeaturizer().featurize_pure(
+        df, n_jobs=1, return_report=True
+    )
+    assert report.mask.tolist() == [True, False, False, True, False]
+    assert [f['index'] for f in report.failures] == [1, 2, 4]
+    assert sorted(counting_features) == ['CCO', 'O']
+    assert feat_df.loc[~report.mask, 'tpsa'].isna().all()
+    assert feat_df.loc[report.mask, 'tpsa'].notna().all()
+    assert feat_df['T'].tolist() == df['T'].tolist()
+
+
+def test_featurize_mix_reports_invalid_component(featurizer, df_mix):
+    df = df_mix.copy()
+    df.loc[1, 'MOL_2'] = 'xyz'
+    feat_mix, report = featurizer.featurize_mix_parallel(
+        df, n_jobs=1, return_report=True
+    )
+    assert report.mask.tolist() == [True, False]
+    assert report.to_frame()['smiles'].tolist() == ['xyz']
+    assert len(feat_mix) == 2 * len(df)
+
+
+def test_featurize_pure_all_invalid(featurizer):
+    df = pd.DataFrame({'MOL': ['C1CC', 'xx'], 'T': [1.0, 2.0], 'logV': [0.0, 0.0]})
+    feat_df, report = featurizer.featurize_pure(df, n_jobs=1, return_report=True)
+    assert not report.mask.any()
+    assert len(feat_df) == len(df)
+    assert feat_df['tpsa'].isna().all()
+
+
+def test_featurize_mix_all_invalid(featurizer):
+    df = pd.DataFrame({
+        'MOL_1': ['C1CC', 'xx'],
+        'MOL_2': ['yy', None],
+        'MolFrac_1': [0.5, 0.2],
+        'T': [300.0, 310.0],
+        'logV': [0.0, 0.0],
+    })
+    feat_mix, report = featurizer.featurize_mix_parallel(
+        df, n_jobs=1, return_report=True
+    )
+    assert not report.mask.any()
+    assert len(feat_mix) == 2 * len(df)
+    assert feat_mix['mol1_tpsa'].isna().all()
+
+
+def test_count_and_flag_columns_are_int64(featurizer, df_pure, df_mix):
+    pure = featurizer.featurize_pure(df_pure, n_jobs=1)
+    assert (pure[list(INTEGER_FEATURES)].dtypes == np.int64).all()
+    assert pure['tpsa'].dtype == np.float64
+    mix = featurizer.featurize_mix_parallel(df_mix, n_jobs=1)
+    ints = [f'mol{i}_{name}' for i in (1, 2) for name in INTEGER_FEATURES]
+    assert (mix[ints].dtypes == np.int64).all()
+    assert mix['frac'].dtype == np.float64
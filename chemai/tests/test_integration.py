@@ -184,6 +184,53 @@ def test_trainer_step_mix():
     trainer.fit(model, dm)
 
 
+def test_trainer_step_mix_bf16():
+    base = DummyBaseHF(hidden_size=8)
+    model = ChemBERTModel(base, mode='mix')
+    dm = ChemBERTDataModule(
+        DummyTokenizer(),
+        train_data=make_mix_data(),
+        dev_data=make_mix_data(),
+        batch_size=2,
+    )
+    dm.setup()
+    trainer = pl.Trainer(
+        max_epochs=1,
+        limit_train_batches=1,
+        limit_val_batches=1,
+        accelerator='cpu',
+        precision='bf16-mixed',
+        logger=False,
+        enable_checkpointing=False,
+    )
+    trainer.fit(model, dm)
+    # Pesos e otimizador continuam em fp32; só o cômputo usa bf16.
+    assert model.mlp[0].weight.dtype == torch.float32
+
+
+def test_trainer_metrics_every_n_steps():
+    base = DummyBaseHF(hidden_size=8)
+    model = ChemBERTModel(base, mode='mix', train_metrics_every_n_steps=2)
+    data = make_mix_data()
+    train = {key: values * 2 for key, values in data.items()}
+    dm = ChemBERTDataModule(
+        DummyTokenizer(), train_data=train, dev_data=data, batch_size=1
+    )
+    dm.setup()
+    updates = []
+    model.train_metrics.update = lambda *args: updates.append(args)
+    trainer = pl.Trainer(
+        max_epochs=1,
+        accelerator='cpu',
+        logger=False,
+        enable_checkpointing=False,
+    )
+    trainer.fit(model, dm)
+    # 4 passos de treino, métricas atualizadas nos passos 0 e 2.
+    assert len(updates) == len(train['y']) // 2
+    assert {'val_r2', 'val_mse', 'val_mae'} <= set(trainer.callback_metrics)
+
+
 # ======================================================================
 # 8. LoRA / PEFT — integração
 # ======================================================================
@@ -210,3 +257,43 @@ def test_integration_lora_forward_backward():
                 assert param.grad is not None
             else:
                 assert param.grad is None
+
+
+class CheckpointingPeftModel(DummyPeftModel):
+    def __init__(self, base_model):
+        super().__init__(base_model)
+        self.checkpointing_kwargs = None
+
+    def gradient_checkpointing_enable(self, gradient_checkpointing_kwargs=None):
+        self.checkpointing_kwargs = gradient_checkpointing_kwargs
+
+
+def test_lora_gradient_checkpointing_and_accumulation():
+    lora = CheckpointingPeftModel(DummyBaseHF(hidden_size=8))
+    model = ChemBERTModel(
+        lora, mode='mix', gradient_checkpointing=True, accumulate_grad_batches=2
+    )
+    assert lora.checkpointing_kwargs == {'use_reentrant': False}
+    (scheduler,) = model.configure_callbacks()
+    assert isinstance(scheduler, pl.callbacks.GradientAccumulationScheduler)
+
+    dm = ChemBERTDataModule(
+        DummyTokenizer(),
+        train_data=make_mix_data(),
+        dev_data=make_mix_data(),
+        batch_size=1,
+    )
+    trainer = pl.Trainer(
+        max_epochs=1,
+        accelerator='cpu',
+        logger=False,
+        enable_checkpointing=False,
+    )
+    trainer.fit(model, dm)
+    assert trainer.accumulate_grad_batches == model.accumulate_grad_batches
+
+
+def test_gradient_checkpointing_ignored_for_frozen_encoder():
+    model = ChemBERTModel(DummyBaseHF(hidden_size=8), gradient_checkpointing=True)
+    assert not model.gradient_checkpointing
+    assert model.configure_callbacks() == []
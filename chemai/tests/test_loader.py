@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -107,3 +108,108 @@ def test_full_pipeline(loader):
     assert 'test' in mix
     assert isinstance(pure['train'], pd.DataFrame)
     assert isinstance(mix['test'], pd.DataFrame)
+
+
+def test_prepare_compacts_dtypes(loader):
+    loader.prepare()
+    mix = loader.get_mix()['train']
+    assert isinstance(mix[COL_MOL1].dtype, pd.CategoricalDtype)
+    assert mix[COL_LOGV].dtype == np.float32
+
+
+def test_parquet_cache_reused(loader, monkeypatch):
+    loader.prepare()
+    expected = loader.get_pure()['train']
+
+    def fail(*_, **__):
+        raise AssertionError('CSV não deveria ser lido')
+
+    monkeypatch.setattr(pd, 'read_csv', fail)
+    cached = DipprDatasetLoader(loader.data_dir)
+    pd.testing.assert_frame_equal(cached.get_pure()['train'], expected)
+
+
+def test_parquet_cache_invalidated_by_source_change(loader, tmp_path):
+    loader.prepare()
+    old_hash = loader.source_hash()
+    df = pd.read_csv(tmp_path / 'data.csv')
+    df[COL_LOGV] += 1.0
+    df.to_csv(tmp_path / 'data.csv', index=False)
+    fresh = DipprDatasetLoader(str(tmp_path))
+    assert fresh.source_hash() != old_hash
+    mix = fresh.get_mix()['train']
+    assert np.isclose(mix[COL_LOGV].iloc[0], 1.2 + 1.0)
+
+
+def _as_objects(df):
+    return df.astype({COL_MOL1: object, COL_MOL2: object}).map(
+        lambda v: None if pd.isna(v) else v
+    )
+
+
+def test_normalize_vectorized_matches_reference():
+    rng = np.random.default_rng(0)
+    n = 500
+    names = np.array(['CCO', 'O', 'CC', 'c1ccccc1', 'CO', None], dtype=object)
+    frac = rng.choice([0.0, 1.0, 0.25, 0.5, 0.9, 1e-9], size=n)
+    raw = pd.DataFrame({
+        COL_MOL1: rng.choice(names, size=n),
+        COL_MOL2: rng.choice(names, size=n),
+        COL_FRAC: frac,
+        COL_T: rng.uniform(250, 400, size=n),
+        COL_LOGV: rng.normal(size=n),
+    })
+    expected = DipprDatasetLoader._normalize(raw)
+    result = DipprDatasetLoader._normalize_vectorized(raw)
+    assert list(result.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(
+        _as_objects(result), _as_objects(expected), check_dtype=False
+    )
+
+
+def test_normalize_vectorized_does_not_modify_input(sample_raw_df):
+    before = sample_raw_df.copy()
+    DipprDatasetLoader._normalize_vectorized(sample_raw_df)
+    pd.testing.assert_frame_equal(sample_raw_df, before)
+
+
+def test_iter_chunks_matches_prepare(loader):
+    loader.use_cache = False
+    loader.prepare()
+    chunks = list(loader.iter_chunks('train', chunksize=2))
+    expected_chunks = 2
+    assert len(chunks) == expected_chunks
+    pure = pd.concat([p for p, _ in chunks], ignore_index=True)
+    mix = pd.concat([m for _, m in chunks], ignore_index=True)
+    pd.testing.assert_frame_equal(
+        pure.astype({COL_MOL: object}),
+        loader.get_pure()['train'].astype({COL_MOL: object}),
+    )
+    assert len(mix) == len(loader.get_mix()['train'])
+
+
+def test_iter_chunks_rejects_misaligned_files(loader, tmp_path):
+    feats = pd.read_csv(tmp_path / 'data_features.csv')
+    feats.iloc[:-1].to_csv(tmp_path / 'data_features.csv', index=False)
+    with pytest.raises(ValueError, match='linhas'):
+        list(loader.iter_chunks('train', chunksize=2))
+
+
+def test_write_partitioned(loader, tmp_path):
+    out = tmp_path / 'parts'
+    counts = loader.write_partitioned(str(out), 'train', chunksize=1)
+    pure = pd.read_parquet(out / 'train_pure')
+    mix = pd.read_parquet(out / 'train_mix')
+    assert counts == {'pure': len(pure), 'mix': len(mix)}
+    assert len(list((out / 'train_mix').glob('part-*.parquet'))) == len(mix)
+
+
+def test_prepare_with_assigned_raw_skips_cache(tmp_path, sample_raw_df):
+    loader = DipprDatasetLoader(str(tmp_path))
+    loader.train_raw = sample_raw_df
+    loader.test_raw = sample_raw_df
+    loader.prepare()
+    assert not list(tmp_path.iterdir())
+    assert len(loader.get_pure()['train']) + len(loader.get_mix()['train']) == len(
+        sample_raw_df
+    )
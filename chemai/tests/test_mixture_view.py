@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from chemai.mixture_view import SymmetricMixtureView
+
+
+def make_view():
+    table = np.arange(12, dtype=np.float64).reshape(4, 3)
+    return SymmetricMixtureView(
+        table,
+        table,
+        frac=[0.2, 0.7],
+        extra=[300.0, 350.0],
+        target=[1.0, 2.0],
+        index_1=[0, 2],
+        index_2=[1, 3],
+        feature_names=['a', 'b', 'c'],
+        extra_names=['T'],
+    )
+
+
+def test_view_rows_and_swapped_rows():
+    view = make_view()
+    assert len(view) == 2 * 2
+    assert view.shape == (len(view), len(view.columns))
+    assert view.columns[:2] == ['mol1_a', 'mol1_b']
+    assert np.array_equal(view[0], [0, 1, 2, 3, 4, 5, 0.2, 300])
+    assert np.allclose(view[2], [3, 4, 5, 0, 1, 2, 0.8, 300])
+    _, y = view.take([1, 3])
+    assert np.array_equal(y, [2.0, 2.0])
+
+
+def test_view_matches_materialized_concat():
+    view = make_view()
+    frame = view.to_frame()
+    assert np.array_equal(frame.drop(columns='logV').to_numpy(), np.asarray(view))
+    batches = list(view.iter_batches(3, shuffle=True))
+    stacked = np.vstack([x for x, _ in batches])
+    assert sorted(map(tuple, stacked)) == sorted(map(tuple, np.asarray(view)))
+    assert isinstance(frame, pd.DataFrame)
+
+
+def test_view_keeps_feature_dtype():
+    emb = np.ones((2, 4), dtype=np.float32)
+    view = SymmetricMixtureView(
+        emb, emb, frac=[0.25, 0.5], extra=[298.15, 310.0], extra_names=['T']
+    )
+    assert np.asarray(view).dtype == np.float32
+    # Na tabela, frac e T não perdem precisão.
+    frame = view.to_frame()
+    assert frame['mol1_0'].dtype == np.float32
+    assert frame['T'].dtype == np.float64
+    assert frame['T'].iloc[0] == 298.15  # noqa: PLR2004
+    assert np.array_equal(frame['frac'], [0.25, 0.5, 0.75, 0.5])
@@ -48,3 +48,51 @@ def test_model_mix_backward():
     loss = model.training_step(batch, 0)
     loss.backward()
     assert torch.isfinite(loss)
+
+
+class CountingEncoder(torch.nn.Module):
+    def __init__(self, hidden=8):
+        super().__init__()
+        self.emb = torch.nn.Embedding(10, hidden)
+        self.config = type('cfg', (), {'hidden_size': hidden, 'pad_token_id': 0})
+        self.calls = 0
+        self.rows = 0
+
+    def forward(self, input_ids, attention_mask):
+        self.calls += 1
+        self.rows += input_ids.shape[0]
+        hidden = self.emb(input_ids) * attention_mask.unsqueeze(-1)
+        hidden[:, 0, :] = hidden.sum(dim=1)
+        return type('obj', (), {'last_hidden_state': hidden})
+
+
+def test_model_mix_single_encoder_pass_matches_two_passes():
+    torch.manual_seed(0)
+    base = CountingEncoder()
+    model = ChemBERTModel(base_model=base, mode='mix')
+    model.eval()
+    ids1 = torch.tensor([[1, 2, 3], [4, 5, 0], [1, 2, 3]])
+    ids2 = torch.tensor([[4, 5, 0, 0], [6, 7, 8, 9], [6, 7, 8, 9]])
+    batch = {
+        'input_ids_1': ids1,
+        'attention_mask_1': (ids1 > 0).long(),
+        'input_ids_2': ids2,
+        'attention_mask_2': (ids2 > 0).long(),
+        'temperatures': torch.tensor([300, 310, 320], dtype=torch.float),
+        'frac': torch.tensor([0.2, 0.4, 0.8], dtype=torch.float),
+    }
+    with torch.no_grad():
+        out = model(batch)
+        assert base.calls == 1
+        # [1, 2, 3], [4, 5] e [6, 7, 8, 9] são as únicas moléculas distintas.
+        assert base.rows == ids1.shape[0]
+
+        cls1 = base(ids1, batch['attention_mask_1']).last_hidden_state[:, 0, :]
+        cls2 = base(ids2, batch['attention_mask_2']).last_hidden_state[:, 0, :]
+        t = batch['temperatures'].unsqueeze(1)
+        f = batch['frac'].unsqueeze(1)
+        expected = 0.5 * (
+            model.mlp(torch.cat([cls1, cls2, t, f], dim=1))
+            + model.mlp(torch.cat([cls2, cls1, t, 1 - f], dim=1))
+        ).squeeze(1)
+    assert torch.allclose(out, expected, atol=1e-5)
@@ -42,3 +42,21 @@ def test_model_pure_backward():
     loss = model.training_step(batch, 0)
     loss.backward()
     assert torch.isfinite(loss)
+
+
+def test_model_pure_bf16_autocast_outputs_fp32():
+    base = DummyBaseModel(hidden=16)
+    model = ChemBERTModel(base_model=base, mode='pure')
+    batch = {
+        'input_ids_1': torch.ones(2, 10, dtype=torch.long),
+        'attention_mask_1': torch.ones(2, 10, dtype=torch.long),
+        'temperatures': torch.tensor([300, 310], dtype=torch.float),
+        'y': torch.tensor([1.0, 2.0], dtype=torch.float),
+    }
+    with torch.autocast('cpu', dtype=torch.bfloat16):
+        out = model(batch)
+        loss = model.training_step(batch, 0)
+    assert out.dtype == torch.float32
+    assert loss.dtype == torch.float32
+    loss.backward()
+    assert model.mlp[0].weight.grad.dtype == torch.float32
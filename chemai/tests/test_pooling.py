@@ -0,0 +1,35 @@
+import pytest
+import torch
+
+from chemai.pooling import pool, pooled_dim
+
+
+@pytest.fixture
+def hidden_and_mask():
+    hidden = torch.arange(24, dtype=torch.float).reshape(2, 4, 3)
+    mask = torch.tensor([[1, 1, 0, 0], [1, 1, 1, 1]])
+    return hidden, mask
+
+
+def test_mean_pooling_is_masked(hidden_and_mask):
+    hidden, mask = hidden_and_mask
+    out = pool(hidden, mask, 'mean')
+    assert torch.allclose(out[0], hidden[0, :2].mean(dim=0))
+    assert torch.allclose(out[1], hidden[1].mean(dim=0))
+
+
+def test_max_pooling_is_masked(hidden_and_mask):
+    hidden, mask = hidden_and_mask
+    out = pool(hidden, mask, 'max')
+    assert torch.equal(out[0], hidden[0, 1])
+
+
+def test_concat_pooling_dim(hidden_and_mask):
+    hidden, mask = hidden_and_mask
+    out = pool(hidden, mask, 'concat')
+    assert out.shape == (2, pooled_dim(3, 'concat'))
+
+
+def test_invalid_pooling(hidden_and_mask):
+    with pytest.raises(ValueError, match='Pooling inválido'):
+        pool(*hidden_and_mask, 'sum')
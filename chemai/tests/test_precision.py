@@ -0,0 +1,12 @@
+from chemai import precision
+
+
+def test_training_precision_cpu(monkeypatch):
+    monkeypatch.setattr(precision, 'cpu_bf16_supported', lambda: True)
+    assert precision.training_precision('cpu') == 'bf16-mixed'
+    monkeypatch.setattr(precision, 'cpu_bf16_supported', lambda: False)
+    assert precision.training_precision('cpu') == '32-true'
+
+
+def test_cpu_bf16_supported_returns_bool():
+    assert isinstance(precision.cpu_bf16_supported(), bool)
@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+import torch
+
+from chemai.embedding_store import EmbeddingStore
+from chemai.predictor import ChemBERTPredictor
+
+HIDDEN = 8
+
+
+class DummyTokenizer:
+    def __call__(
+        self, smiles, padding, truncation, max_length, return_tensors=None
+    ):
+        _ = truncation
+        ids = [[ord(c) % 50 for c in s][:max_length] for s in smiles]
+        size = max(len(i) for i in ids) if padding in {True, 'longest'} else max_length
+        input_ids = torch.zeros(len(ids), size, dtype=torch.long)
+        mask = torch.zeros(len(ids), size, dtype=torch.long)
+        for row, seq in enumerate(ids):
+            input_ids[row, : len(seq)] = torch.tensor(seq)
+            mask[row, : len(seq)] = 1
+        return {'input_ids': input_ids, 'attention_mask': mask}
+
+
+class CountingEncoder(torch.nn.Module):
+    """Encoder determinístico que conta quantas moléculas processou."""
+
+    def __init__(self):
+        super().__init__()
+        self.emb = torch.nn.Embedding(50, HIDDEN)
+        self.config = type('cfg', (), {'hidden_size': HIDDEN})
+        self.calls = 0
+        self.rows = 0
+
+    def forward(self, input_ids, attention_mask):
+        self.calls += 1
+        self.rows += input_ids.shape[0]
+        hidden = self.emb(input_ids) * attention_mask.unsqueeze(-1)
+        hidden[:, 0, :] = hidden.sum(dim=1)
+        return type('obj', (), {'last_hidden_state': hidden})
+
+
+def make_predictor(monkeypatch, mode, **kwargs):
+    torch.manual_seed(0)
+    monkeypatch.setattr(
+        ChemBERTPredictor, '_load_tokenizer', lambda self: DummyTokenizer()
+    )
+    monkeypatch.setattr(
+        ChemBERTPredictor, '_load_base_model', lambda self: CountingEncoder()
+    )
+    in_dim = HIDDEN + 1 if mode == 'pure' else 2 * HIDDEN + 2
+    monkeypatch.setattr(
+        ChemBERTPredictor, '_load_mlp', lambda self: torch.nn.Linear(in_dim, 1)
+    )
+    monkeypatch.setattr(ChemBERTPredictor, '_load_scaler', lambda self: None)
+    return ChemBERTPredictor(
+        mode=mode, model_dir='unused', hf_model_name='dummy', **kwargs
+    )
+
+
+@pytest.fixture
+def pure_predictor(monkeypatch):
+    return make_predictor(monkeypatch, 'pure')
+
+
+@pytest.fixture
+def mix_predictor(monkeypatch):
+    return make_predictor(monkeypatch, 'mix')
+
+
+def test_predict_pure_uses_embedding_cache(pure_predictor):
+    first = pure_predictor.predict(['CCO', 'CCC'], temp=[300.0, 310.0])
+    assert pure_predictor.base_model.calls == 1
+    second = pure_predictor.predict(['CCO', 'CCC'], temp=[300.0, 310.0])
+    assert pure_predictor.base_model.calls == 1
+    assert np.allclose(first, second)
+    assert pure_predictor.cache.stats()['hits'] >= len(second)
+
+
+def test_predict_cache_key_is_canonical(monkeypatch):
+    predictor = make_predictor(monkeypatch, 'pure', canonicalize=True)
+    predictor.predict('CCO', temp=300.0)
+    predictor.predict('OCC', temp=300.0)
+    assert predictor.base_model.calls == 1
+
+
+def test_predict_encodes_smiles_as_given(pure_predictor):
+    # 'OCC' não é canônico: o encoder deve receber a string original.
+    tokens = pure_predictor._encode_smiles(['OCC'])
+    with torch.no_grad():
+        cls = pure_predictor.base_model(**tokens).last_hidden_state[:, 0, :]
+        x = torch.cat([cls, torch.tensor([[300.0]])], dim=1)
+        expected = pure_predictor.mlp(x).squeeze(1).numpy()
+    for _ in range(2):  # sem cache e com cache
+        out = pure_predictor.predict('OCC', temp=300.0)
+        assert np.allclose(out, expected, atol=1e-6)
+
+
+def test_predict_mix_shape(mix_predictor):
+    out = mix_predictor.predict(
+        ['CCO', 'O'], smiles2=['C', 'CC'], frac=[0.2, 0.8], temp=[300.0, 320.0]
+    )
+    assert out.shape == (2,)
+    assert np.isfinite(out).all()
+
+
+def test_predict_mix_encodes_each_molecule_once(mix_predictor):
+    smiles1 = ['CCO', 'O', 'CCO', 'O'] * 25
+    smiles2 = ['O', 'CCC', 'CCC', 'OCC'] * 25
+    n = len(smiles1)
+    mix_predictor.predict(smiles1, smiles2=smiles2, frac=[0.5] * n, temp=[300.0] * n)
+    assert mix_predictor.base_model.calls == 1
+    assert mix_predictor.base_model.rows == len({'CCO', 'O', 'CCC', 'OCC'})
+
+
+def test_predict_dedup_matches_row_by_row(mix_predictor):
+    smiles1 = ['CCO', 'O', 'CCO']
+    smiles2 = ['O', 'CCC', 'CCC']
+    frac = [0.2, 0.5, 0.9]
+    temp = [300.0, 310.0, 320.0]
+    batch = mix_predictor.predict(smiles1, smiles2=smiles2, frac=frac, temp=temp)
+    single = [
+        mix_predictor.predict(s1, smiles2=s2, frac=f, temp=t)[0]
+        for s1, s2, f, t in zip(smiles1, smiles2, frac, temp)
+    ]
+    assert np.allclose(batch, single, atol=1e-5)
+
+
+def test_predict_reuses_persistent_store(monkeypatch, tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    first = make_predictor(monkeypatch, 'pure', store=store)
+    expected = first.predict(['CCO', 'CCC'], temp=[300.0, 310.0])
+    assert len(store) == len(expected)
+    # Novo processo/preditor: LRU vazio, mas os vetores vêm do disco.
+    second = make_predictor(monkeypatch, 'pure', store=EmbeddingStore(str(tmp_path)))
+    out = second.predict(['CCO', 'CCC'], temp=[300.0, 310.0])
+    assert second.base_model.calls == 0
+    assert np.allclose(out, expected, atol=1e-6)
@@ -0,0 +1,88 @@
+import pytest
+import torch
+from peft import LoraConfig, PeftModel, get_peft_model
+from transformers import BertConfig, BertModel
+
+from chemai import registry as registry_module
+from chemai.registry import BackboneView, ModelRegistry
+
+CONFIG = BertConfig(
+    vocab_size=50,
+    hidden_size=8,
+    num_hidden_layers=1,
+    num_attention_heads=2,
+    intermediate_size=16,
+)
+
+
+def tiny_bert():
+    torch.manual_seed(0)
+    return BertModel(CONFIG).eval()
+
+
+def save_adapter(path, seed):
+    torch.manual_seed(seed)
+    model = get_peft_model(
+        tiny_bert(), LoraConfig(r=2, target_modules=['query', 'value'])
+    )
+    for name, p in model.named_parameters():
+        if 'lora_B' in name:
+            torch.nn.init.normal_(p)
+    model.save_pretrained(path)
+    return str(path)
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+
+    def fake_from_pretrained(name):
+        calls.append(name)
+        return tiny_bert()
+
+    monkeypatch.setattr(
+        registry_module.AutoModel, 'from_pretrained', fake_from_pretrained
+    )
+    return calls
+
+
+@pytest.fixture
+def inputs():
+    return {
+        'input_ids': torch.tensor([[1, 5, 7, 2]]),
+        'attention_mask': torch.ones(1, 4, dtype=torch.long),
+    }
+
+
+def hidden(model, inputs):
+    with torch.no_grad():
+        return model(**inputs).last_hidden_state
+
+
+def test_registry_shares_backbone(loads, tmp_path, inputs):
+    reg = ModelRegistry(device='cpu')
+    dir_a = save_adapter(tmp_path / 'a', seed=1)
+    dir_b = save_adapter(tmp_path / 'b', seed=2)
+    base = reg.get_backbone('dummy')
+    lora_a = reg.get_backbone('dummy', adapter_dir=dir_a)
+    lora_b = reg.get_backbone('dummy', adapter_dir=dir_b)
+    assert isinstance(base, BackboneView)
+    assert loads == ['dummy']
+
+    expected_base = hidden(tiny_bert(), inputs)
+    expected_a = hidden(PeftModel.from_pretrained(tiny_bert(), dir_a), inputs)
+    expected_b = hidden(PeftModel.from_pretrained(tiny_bert(), dir_b), inputs)
+    assert torch.allclose(hidden(lora_a, inputs), expected_a, atol=1e-6)
+    assert torch.allclose(hidden(base, inputs), expected_base, atol=1e-6)
+    assert torch.allclose(hidden(lora_b, inputs), expected_b, atol=1e-6)
+    assert not torch.allclose(expected_a, expected_base)
+
+
+def test_registry_merged_copy(loads, tmp_path, inputs):
+    reg = ModelRegistry(device='cpu')
+    dir_a = save_adapter(tmp_path / 'a', seed=1)
+    merged = reg.get_backbone('dummy', adapter_dir=dir_a, merge=True)
+    assert not isinstance(merged, PeftModel)
+    assert reg.get_backbone('dummy', adapter_dir=dir_a, merge=True) is merged
+    expected = hidden(PeftModel.from_pretrained(tiny_bert(), dir_a), inputs)
+    assert torch.allclose(hidden(merged, inputs), expected, atol=1e-5)
@@ -0,0 +1,26 @@
+from chemai.sampler import LengthBucketSampler
+
+
+def test_sampler_sorted_without_shuffle():
+    lengths = [5, 1, 4, 2, 3]
+    batches = list(LengthBucketSampler(lengths, batch_size=2))
+    assert batches == [[1, 3], [4, 2], [0]]
+    assert len(LengthBucketSampler(lengths, batch_size=2)) == len(batches)
+
+
+def test_sampler_shuffle_covers_all_indices():
+    lengths = [i % 7 for i in range(103)]
+    sampler = LengthBucketSampler(lengths, batch_size=8, shuffle=True, bucket_size=4)
+    batches = list(sampler)
+    assert len(batches) == len(sampler)
+    flat = sorted(i for b in batches for i in b)
+    assert flat == list(range(len(lengths)))
+    # dentro de cada lote os comprimentos são próximos
+    spread = [max(lengths[i] for i in b) - min(lengths[i] for i in b) for b in batches]
+    assert sum(spread) / len(spread) < max(lengths) / 2
+
+
+def test_sampler_drop_last():
+    sampler = LengthBucketSampler(list(range(10)), batch_size=4, drop_last=True)
+    assert [len(b) for b in sampler] == [4, 4]
+    assert len(sampler) == len(list(sampler))
@@ -0,0 +1,72 @@
+import numpy as np
+import torch
+
+from chemai.dataset import BaseSMILESDataset, MoleculeTableDataset, tokenize
+from chemai.token_cache import TokenCache, tokenizer_fingerprint
+
+
+class CountingTokenizer:
+    """Tokenizer fake (um token por caractere) que conta as chamadas."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, smiles, padding, truncation, max_length):
+        _ = padding
+        _ = truncation
+        self.calls += 1
+        ids = [[ord(c) % 20 + 1 for c in s][:max_length] for s in smiles]
+        return {
+            'input_ids': [i + [0] * (max_length - len(i)) for i in ids],
+            'attention_mask': [[1] * len(i) + [0] * (max_length - len(i)) for i in ids],
+        }
+
+
+class VocabTokenizer(CountingTokenizer):
+    def __init__(self, vocab):
+        super().__init__()
+        self.vocab = vocab
+
+    def get_vocab(self):
+        return self.vocab
+
+
+def test_tokenize_reuses_cache_across_instances(tmp_path):
+    tok = CountingTokenizer()
+    smiles = ['CCO', 'O', 'CCCC']
+    ids, mask = tokenize(tok, smiles, 8, TokenCache(str(tmp_path)))
+    cached_ids, cached_mask = tokenize(tok, smiles, 8, TokenCache(str(tmp_path)))
+    assert tok.calls == 1
+    assert isinstance(cached_ids, np.memmap)
+    np.testing.assert_array_equal(cached_ids, ids)
+    np.testing.assert_array_equal(cached_mask, mask)
+
+
+def test_cache_key_depends_on_inputs():
+    tok = CountingTokenizer()
+    key = TokenCache.key(tok, ['CCO', 'O'], 8)
+    assert key == TokenCache.key(tok, ['CCO', 'O'], 8)
+    assert key != TokenCache.key(tok, ['CCO', 'O'], 16)
+    assert key != TokenCache.key(tok, ['CC', 'OO'], 8)
+    assert tokenizer_fingerprint(VocabTokenizer({'C': 1})) != tokenizer_fingerprint(
+        VocabTokenizer({'C': 2})
+    )
+
+
+def test_datasets_built_from_cache_match(tmp_path):
+    kwargs = {
+        'smiles_1': ['CCO', 'O', 'CCO'],
+        'smiles_2': ['O', 'CCCC', 'CCCC'],
+        'temperatures': [300, 310, 320],
+        'frac': [0.2, 0.5, 0.7],
+        'max_length': 8,
+    }
+    tok = CountingTokenizer()
+    for dataset_cls in (BaseSMILESDataset, MoleculeTableDataset):
+        fresh = dataset_cls(tok, **kwargs)
+        dataset_cls(tok, token_cache=TokenCache(str(tmp_path)), **kwargs)
+        calls = tok.calls
+        cached = dataset_cls(tok, token_cache=TokenCache(str(tmp_path)), **kwargs)
+        assert tok.calls == calls
+        for key, value in fresh[1].items():
+            assert torch.equal(cached[1][key], value)
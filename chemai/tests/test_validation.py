@@ -0,0 +1,20 @@
+import numpy as np
+
+from chemai.validation import combine_reports, validate_smiles
+
+
+def test_validate_smiles_mask_and_failures():
+    report = validate_smiles(['CCO', 'C1CC', '', 'O', 'C1CC', None])
+    assert report.mask.tolist() == [True, False, False, True, False, False]
+    assert [f['index'] for f in report.failures] == [1, 2, 4, 5]
+    assert report.n_invalid == len(report.failures)
+    assert 'C1CC' in report.failures[0]['error']
+
+
+def test_combine_and_slice_reports():
+    report = validate_smiles(['CCO', 'xx', 'O', 'yy'])
+    first, second = report.slice(0, 2), report.slice(2, 4)
+    assert second.failures[0]['index'] == 1
+    combined = combine_reports(first, second)
+    assert np.array_equal(combined.mask, [True, False])
+    assert combined.errors_by_row()[1].count('SMILES inválido') == len(report.failures)
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+TOKEN_ARRAYS = ('input_ids', 'attention_mask')
+
+
+def tokenizer_fingerprint(tokenizer):
+    """Hash curto do vocabulário e das regras do tokenizer."""
+    digest = hashlib.sha256(type(tokenizer).__qualname__.encode())
+    for attr in ('name_or_path', 'padding_side', 'truncation_side'):
+        digest.update(str(getattr(tokenizer, attr, '')).encode())
+    backend = getattr(tokenizer, 'backend_tokenizer', None)
+    if backend is not None:
+        digest.update(backend.to_str().encode())
+    elif hasattr(tokenizer, 'get_vocab'):
+        digest.update(json.dumps(sorted(tokenizer.get_vocab().items())).encode())
+    return digest.hexdigest()[:16]
+
+
+class TokenCache:
+    """
+    Cache em disco de SMILES tokenizados, compartilhado entre processos.
+
+    Cada entrada é um diretório com ``input_ids.npy`` e ``attention_mask.npy``,
+    identificado pelo fingerprint do tokenizer, ``max_length`` e o hash da
+    lista de SMILES. Os arquivos são lidos com ``mmap_mode='c'``: as páginas
+    são compartilhadas entre processos e não há nova tokenização.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def key(tokenizer, smiles, max_length):
+        digest = hashlib.sha256(
+            f'{tokenizer_fingerprint(tokenizer)}:{max_length}'.encode()
+        )
+        for s in smiles:
+            digest.update(str(s).encode())
+            digest.update(b'\0')
+        return digest.hexdigest()[:24]
+
+    def get(self, key):
+        """Retorna ``(input_ids, attention_mask)`` ou ``None``."""
+        entry = os.path.join(self.path, key)
+        if not os.path.isdir(entry):
+            return None
+        return tuple(
+            np.load(os.path.join(entry, f'{name}.npy'), mmap_mode='c')
+            for name in TOKEN_ARRAYS
+        )
+
+    def put(self, key, input_ids, attention_mask):
+        tmp = tempfile.mkdtemp(dir=self.path)
+        for name, array in zip(TOKEN_ARRAYS, (input_ids, attention_mask)):
+            np.save(os.path.join(tmp, f'{name}.npy'), array)
+        try:
+            os.replace(tmp, os.path.join(self.path, key))
+        except OSError:
+            # Outro processo gravou a mesma entrada primeiro.
+            shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from rdkit import Chem, RDLogger
+
+
+class ValidationReport:
+    """Máscara de linhas válidas e a lista de falhas de uma featurização."""
+
+    def __init__(self, mask, failures):
+        self.mask = mask
+        self.failures = failures
+
+    @property
+    def n_invalid(self):
+        return len(self.failures)
+
+    def slice(self, start, stop):
+        """Relatório das linhas ``start:stop``, com índices relativos."""
+        failures = [
+            {**f, 'index': f['index'] - start}
+            for f in self.failures
+            if start <= f['index'] < stop
+        ]
+        return ValidationReport(self.mask[start:stop], failures)
+
+    def errors_by_row(self):
+        errors = {}
+        for f in self.failures:
+            errors.setdefault(f['index'], []).append(f['error'])
+        return {i: ' '.join(msgs) for i, msgs in errors.items()}
+
+    def to_frame(self):
+        return pd.DataFrame(self.failures, columns=['index', 'smiles', 'error'])
+
+
+def combine_reports(*reports):
+    """Uma linha só é válida quando é válida em todos os relatórios."""
+    mask = np.logical_and.reduce([r.mask for r in reports])
+    failures = sorted(
+        (f for r in reports for f in r.failures), key=lambda f: f['index']
+    )
+    return ValidationReport(mask, failures)
+
+
+def smiles_error(smiles):
+    """Mensagem de erro do SMILES ou ``None`` quando ele é válido."""
+    if not isinstance(smiles, str) or not smiles.strip():
+        return 'SMILES vazio ou ausente.'
+    RDLogger.DisableLog('rdApp.error')
+    try:
+        mol = Chem.MolFromSmiles(smiles)
+    finally:
+        RDLogger.EnableLog('rdApp.error')
+    return None if mol is not None else f"SMILES inválido: '{smiles}'."
+
+
+def validate_smiles(smiles):
+    """
+    Valida cada SMILES distinto uma única vez.
+
+    Retorna um ``ValidationReport`` com a máscara booleana por linha e uma
+    falha ``{'index', 'smiles', 'error'}`` por linha inválida.
+    """
+    codes, uniques = pd.factorize(
+        pd.Series(smiles, dtype=object), use_na_sentinel=False
+    )
+    errors = [smiles_error(s) for s in uniques]
+    invalid = np.array([e is not None for e in errors], dtype=bool)
+    mask = ~invalid[codes]
+    failures = [
+        {'index': int(i), 'smiles': uniques[codes[i]], 'error': errors[codes[i]]}
+        for i in np.flatnonzero(~mask)
+    ]
+    return ValidationReport(mask, failures)